@@ -0,0 +1,132 @@
+"""
+Fake YouTube Data API for benchmarks
+Serves deterministic channels / search / videos / commentThreads responses from a local
+thread, so fetch_youtube_data() can be timed end to end without a key,
+network or quota. Point the fetcher at it with YOUTUBE_API_ENDPOINT.
+"""
+
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def _seed(value):
+    return zlib.crc32(value.encode())
+
+
+def channel_item(channel_id):
+    seed = _seed(channel_id)
+    return {
+        "id": channel_id,
+        "snippet": {"title": f"Fake Channel {channel_id}"},
+        "statistics": {
+            "subscriberCount": str(1000 + seed % 100_000),
+            "viewCount": str(50_000 + seed % 10_000_000),
+            "videoCount": str(10 + seed % 500),
+        },
+    }
+
+
+def search_items(channel_id, max_results):
+    return [{
+        "id": {"kind": "youtube#video", "videoId": f"{channel_id}_v{i:05d}"},
+        "snippet": {"title": f"Fake video {i} #benchmark", "publishedAt": f"2024-01-{i % 28 + 1:02d}T12:00:00Z"},
+    } for i in range(max_results)]
+
+
+def video_item(video_id):
+    seed = _seed(video_id)
+    views = 100 + seed % 1_000_000
+    return {
+        "id": video_id,
+        "statistics": {
+            "viewCount": str(views),
+            "likeCount": str(views // 25),
+            "commentCount": str(views // 120),
+        },
+    }
+
+
+def comment_threads(video_id, page_token, max_results):
+    """One page of a video's comment threads (newest first), plus the next page token"""
+    total = _seed(video_id) % 250
+    start = int(page_token or 0)
+    end = min(start + max_results, total)
+    items = [{
+        "id": f"{video_id}_t{total - i:05d}",
+        "snippet": {
+            "videoId": video_id,
+            "channelId": video_id.split("_v")[0],
+            "totalReplyCount": i % 4,
+            "topLevelComment": {"snippet": {
+                "authorDisplayName": f"viewer{i % 97}",
+                "textDisplay": f"Comment {total - i} on {video_id}",
+                "likeCount": (_seed(f"{video_id}{i}") % 50),
+                "publishedAt": f"2024-02-{(total - i) % 28 + 1:02d}T10:00:00Z",
+                "updatedAt": f"2024-02-{(total - i) % 28 + 1:02d}T10:00:00Z",
+            }},
+        },
+    } for i in range(start, end)]
+    return items, (str(end) if end < total else None)
+
+
+class FakeYouTubeHandler(BaseHTTPRequestHandler):
+    latency = 0.0      # seconds added to every response, to mimic a real round trip
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        resource = url.path.rstrip("/").rsplit("/", 1)[-1]
+
+        if resource == "channels":
+            body = {"items": [channel_item(c) for c in query.get("id", "").split(",") if c]}
+        elif resource == "search":
+            body = {"items": search_items(query.get("channelId", ""), int(query.get("maxResults", 5)))}
+        elif resource == "videos":
+            body = {"items": [video_item(v) for v in query.get("id", "").split(",") if v]}
+        elif resource == "commentThreads":
+            video_id = query.get("videoId", "")
+            if video_id.endswith("_disabled"):
+                self._send_json({"error": {"code": 403, "errors": [{"reason": "commentsDisabled"}]}}, 403)
+                return
+            items, next_token = comment_threads(video_id, query.get("pageToken"), int(query.get("maxResults", 20)))
+            body = {"items": items, **({"nextPageToken": next_token} if next_token else {})}
+        else:
+            self.send_error(404)
+            return
+
+        if self.latency:
+            time.sleep(self.latency)
+        self._send_json(body)
+
+    def _send_json(self, body, status=200):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(latency=0.0, port=0):
+    """Start the fake API on a background thread; returns (server, endpoint_url)"""
+    handler = type("Handler", (FakeYouTubeHandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+if __name__ == "__main__":
+    server, endpoint = start_server(port=8765)
+    print(f"🎭 Fake YouTube API listening on {endpoint}")
+    print(f"   YOUTUBE_API_ENDPOINT={endpoint} YOUTUBE_API_KEY=fake python youtube_fetch.py")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
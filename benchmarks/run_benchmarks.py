@@ -0,0 +1,244 @@
+"""
+Benchmark Harness for YouTube Analytics Dashboard
+Builds synthetic databases of several sizes and times every stage the
+dashboard depends on: schema setup, bulk insert, rollups, each dashboard
+query (plus the DuckDB versions of the heavy aggregations when duckdb is
+installed), the derived-metric pipeline and full ingestion sweeps against the
+local fake API (sequential and on 4 worker processes). Results are written as
+JSON so runs can be compared:
+
+    python benchmarks/run_benchmarks.py                          # 1k + 100k
+    python benchmarks/run_benchmarks.py --sizes 1k,100k,10m      # adds ~10M rows
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/baseline.json
+
+Each size runs in its own subprocess against its own scratch database
+(YOUTUBE_DB_PATH), so the real youtube_data.db is never touched.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# generate_demo_data() arguments per size; row counts are approximate
+SIZES = {
+    "1k": {"channels": 1, "videos_per_channel": 40, "snapshot_hours": 24, "days": 30},
+    "100k": {"channels": 10, "videos_per_channel": 100, "snapshot_hours": 6, "days": 30},
+    "10m": {"channels": 200, "videos_per_channel": 300, "snapshot_hours": 6, "days": 50},
+}
+
+# Timings below this many seconds are too noisy to call a regression
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def _stats(runs):
+    return {"min": min(runs), "median": statistics.median(runs), "runs": runs}
+
+
+def quiet(fn):
+    """Wrap fn so its progress prints do not clutter the benchmark output"""
+    def run():
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            return fn()
+    return run
+
+
+def timed(timings, name, fn, repeat=1):
+    """Run fn repeat times, record its wall-clock timings under name and return its last result"""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - started)
+    timings[name] = _stats(runs)
+    print(f"   {name:<28} {timings[name]['median'] * 1000:>10.1f} ms")
+    return result
+
+
+# ---- Worker: runs inside a subprocess with YOUTUBE_DB_PATH set ----
+
+def run_size(size, repeat, fetch_channels, seed):
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+    from sqlalchemy import text
+    from youtube_db import get_engine, init_database
+    from youtube_rollups import refresh_rollups
+    from init_demo_data import generate_demo_data
+    from fake_youtube_api import start_server
+    import youtube_insights as insights
+    import youtube_queries as queries
+    import youtube_duckdb
+
+    timings = {}
+
+    # ---- Setup ----
+    timed(timings, "schema.init_database", init_database)
+    timed(timings, "insert.generate", quiet(lambda: generate_demo_data(seed=seed, refresh=False, **SIZES[size])))
+    timed(timings, "rollups.refresh", refresh_rollups)
+
+    with get_engine().connect() as conn:
+        rows = conn.execute(text("SELECT COUNT(*) FROM video_stats")).scalar()
+        channel_id = conn.execute(text("SELECT channel_id FROM channel_kpis ORDER BY subscribers DESC LIMIT 1")).scalar()
+    print(f"   ({rows:,} video snapshot rows)")
+
+    # ---- Dashboard queries ----
+    channel_latest, channel_history, videos = timed(
+        timings, "query.load_tables", lambda: queries.load_tables(channel_id), repeat)
+    timed(timings, "query.load_channel_kpis", queries.load_channel_kpis, repeat)
+    timed(timings, "query.load_alerts", lambda: queries.load_alerts(channel_id), repeat)
+    timed(timings, "query.load_hashtag_stats", queries.load_hashtag_stats, repeat)
+    timed(timings, "query.search_videos", lambda: queries.search_videos("python", ("ai",)), repeat)
+    timed(timings, "query.snapshot_version", queries.snapshot_version, repeat)
+    timed(timings, "query.load_publish_heatmap", lambda: queries.load_publish_heatmap(backend="sqlite"), repeat)
+    timed(timings, "query.load_monthly_rollup", lambda: queries.load_monthly_rollup(backend="sqlite"), repeat)
+    timed(timings, "query.load_trending", queries.load_trending, repeat)
+
+    # ---- The same aggregations on the DuckDB backend (skipped when duckdb is not installed) ----
+    if youtube_duckdb.available():
+        timed(timings, "duckdb.connect", youtube_duckdb.get_connection)
+        timed(timings, "duckdb.load_publish_heatmap", lambda: queries.load_publish_heatmap(backend="duckdb"), repeat)
+        timed(timings, "duckdb.load_monthly_rollup", lambda: queries.load_monthly_rollup(backend="duckdb"), repeat)
+
+    # ---- Derived metrics (the filter/score pipeline one rerun performs) ----
+    end_date = videos["published_at"].max()
+    start_date = end_date - (videos["published_at"].max() - videos["published_at"].min()) / 2
+    filtered = timed(timings, "derived.filter_by_date",
+                     lambda: queries.filter_by_date(videos, "published_at", start_date.date(), end_date.date()), repeat)
+    timed(timings, "derived.score_videos", lambda: insights.score_videos(filtered), repeat)
+
+    def recommendations():
+        summary = insights.engagement_summary(filtered)
+        return insights.build_recommendations(summary), insights.build_action_items(summary)
+    timed(timings, "derived.recommendations", recommendations, repeat)
+    latest = channel_latest.iloc[0]
+    timed(timings, "derived.health_score", lambda: insights.health_score(
+        latest["subscribers"], latest["total_views"], latest["total_videos"],
+        float(filtered["engagement_rate"].mean() * 100)), repeat)
+
+    # ---- Ingestion sweep against the fake API (includes the incremental rollup) ----
+    server, endpoint = start_server()
+    os.environ.update(YOUTUBE_API_ENDPOINT=endpoint, YOUTUBE_API_KEY="benchmark")
+    import youtube_fetch
+    fake_channels = [f"bench_{i:04d}" for i in range(fetch_channels)]
+    ok = timed(timings, "ingest.fetch_sweep", quiet(lambda: youtube_fetch.fetch_youtube_data(fake_channels)))
+    ok = timed(timings, "ingest.parallel_sweep",
+               quiet(lambda: youtube_fetch.fetch_youtube_data(fake_channels, workers=4))) and ok
+    server.shutdown()
+    if not ok:
+        raise RuntimeError("ingestion sweep against the fake API reported errors")
+
+    return {"rows": rows, "params": SIZES[size], "timings": timings}
+
+
+# ---- Comparison ----
+
+def compare(current, baseline, threshold):
+    """Print per-benchmark ratios against a baseline run; returns the list of regressions"""
+    regressions = []
+    print(f"\n📊 Comparison against baseline (threshold +{threshold:.0%})")
+    for size, result in current["results"].items():
+        base = baseline.get("results", {}).get(size)
+        if not base:
+            print(f"   {size}: not in baseline, skipped")
+            continue
+        for name, stats in result["timings"].items():
+            if name not in base["timings"]:
+                continue
+            now, before = stats["median"], base["timings"][name]["median"]
+            ratio = now / before if before > 0 else float("inf")
+            regressed = ratio > 1 + threshold and now - before > MIN_REGRESSION_SECONDS
+            marker = "❌" if regressed else "✅"
+            print(f"   {marker} {size:>5} {name:<28} {before * 1000:>10.1f} → {now * 1000:>10.1f} ms  ({ratio:.2f}x)")
+            if regressed:
+                regressions.append({"size": size, "name": name, "baseline": before, "current": now, "ratio": ratio})
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's data pipeline")
+    parser.add_argument("--sizes", default="1k,100k", help=f"comma-separated sizes from {', '.join(SIZES)} (default: 1k,100k)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query / derived benchmark (default: 5)")
+    parser.add_argument("--fetch-channels", type=int, default=20, help="channels in the ingestion sweep (default: 20)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the synthetic data")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative slowdown flagged as a regression (default: 0.25)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.worker:
+        result = run_size(args.worker, args.repeat, args.fetch_channels, args.seed)
+        with open(args.output, "w") as f:
+            json.dump(result, f)
+        return 0
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        print(f"❌ Unknown size(s): {', '.join(unknown)}")
+        return 2
+
+    started_at = datetime.now(timezone.utc)
+    report = {
+        "meta": {
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="yt_bench_") as scratch:
+        for size in sizes:
+            print(f"\n⏱️  Benchmarking {size}")
+            result_path = os.path.join(scratch, f"{size}.json")
+            env = {**os.environ, "YOUTUBE_DB_PATH": os.path.join(scratch, f"{size}.db")}
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", size,
+                            "--repeat", str(args.repeat), "--fetch-channels", str(args.fetch_channels),
+                            "--seed", str(args.seed), "--output", result_path], env=env, check=True)
+            with open(result_path) as f:
+                report["results"][size] = json.load(f)
+
+    output = args.output or os.path.join(RESULTS_DIR, started_at.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📁 Results saved to: {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) over +{args.threshold:.0%}")
+            return 1
+        print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,123 +2,219 @@
 Initialize Demo Data for YouTube Analytics Dashboard
 Run this script to populate the database with sample data for testing.
 This allows users to see the dashboard working without a YouTube API key.
+
+The generator is vectorized with NumPy and streams rows into SQLite in
+chunks, so it also doubles as a load-test tool:
+
+    python init_demo_data.py                                   # small demo
+    python init_demo_data.py --channels 200 --videos-per-channel 300 \
+        --snapshot-hours 6 --days 50                           # ~10M snapshot rows
 """
 
-import pandas as pd
-from sqlalchemy import create_engine, text
-from datetime import datetime, timedelta
-import os
-import random
-
-# SQLite connection
-DB_PATH = os.path.join(os.path.dirname(__file__), "youtube_data.db")
-engine = create_engine(f"sqlite:///{DB_PATH}")
-
-def init_database():
-    """Create tables if they don't exist"""
-    with engine.connect() as conn:
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS channel_stats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                channel_name TEXT,
-                subscribers INTEGER,
-                total_views INTEGER,
-                total_videos INTEGER,
-                dislikes INTEGER DEFAULT 0,
-                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS video_stats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                video_id TEXT,
-                title TEXT,
-                published_at TIMESTAMP,
-                views INTEGER,
-                likes INTEGER,
-                dislikes INTEGER DEFAULT 0,
-                comments INTEGER,
-                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        conn.commit()
-
-def generate_demo_data():
-    """Generate realistic demo data"""
-    
+import argparse
+import sqlite3
+import time
+import numpy as np
+from sqlalchemy import text
+from youtube_db import DB_PATH, get_engine, init_database
+from youtube_rollups import refresh_rollups, reset_rollups, reset_alerts
+
+DEMO_CHANNEL_ID = "demo_channel"
+
+TOPICS = np.array([
+    "🚀 Getting Started with Python - Complete Tutorial",
+    "🔥 Top 10 VS Code Extensions You NEED",
+    "💡 Machine Learning for Beginners",
+    "🎯 How I Built My First App in 24 Hours",
+    "⚡ JavaScript Tips That Will Blow Your Mind",
+    "🌟 The Future of AI - What You Need to Know",
+    "🔧 Docker Tutorial for Beginners",
+    "📊 Data Visualization with Python",
+    "🎨 CSS Tricks for Modern Websites",
+    "🛠️ Git & GitHub Crash Course",
+    "🤖 Building a Chatbot from Scratch",
+    "📱 React Native vs Flutter - Which is Better?",
+    "🔐 Web Security Best Practices",
+    "☁️ AWS for Beginners - Cloud Computing 101",
+    "🎬 Video Editing with Python",
+    "use this trick to get vpn for free! 😎🔥",
+    "hey watch pretty memes😊❤️",
+])
+HASHTAGS = np.array(["#meme", "#short", "#python", "#ai", "#tutorial", "#vpn", "#coding", "#tech", "#gaming", "#shorts"])
+# Popular tags come up far more often than niche ones
+HASHTAG_WEIGHTS = 1.0 / np.arange(1, len(HASHTAGS) + 1)
+HASHTAG_WEIGHTS /= HASHTAG_WEIGHTS.sum()
+
+CHANNEL_COLUMNS = ["channel_id", "channel_name", "subscribers", "total_views", "total_videos", "dislikes", "fetched_at"]
+VIDEO_COLUMNS = ["channel_id", "video_id", "title", "published_at", "views", "likes", "dislikes", "comments", "fetched_at"]
+
+
+def _timestamps(seconds):
+    """Epoch seconds -> 'YYYY-MM-DD HH:MM:SS' strings, matching SQLite's CURRENT_TIMESTAMP"""
+    return np.char.replace(np.datetime_as_string(seconds.astype("datetime64[s]"), unit="s"), "T", " ")
+
+
+def _make_titles(rng, n):
+    """Topic + 1-3 hashtags per video"""
+    titles = TOPICS[rng.integers(0, len(TOPICS), n)].astype(object)
+    tag_count = rng.integers(1, 4, n)
+    for slot in range(3):
+        tags = HASHTAGS[rng.choice(len(HASHTAGS), n, p=HASHTAG_WEIGHTS)].astype(object)
+        titles = np.where(tag_count > slot, titles + " " + tags, titles)
+    return titles
+
+
+def generate_channel(rng, channel_id, channel_name, grid, videos_per_channel, history_days):
+    """Build one channel's snapshot rows as column arrays: (channel_columns, video_columns)"""
+    n_snap = len(grid)
+    start, end = grid[0], grid[-1]
+
+    # ---- Videos: power-law reach, saturating growth after publish ----
+    published = rng.uniform(start - history_days * 86400, end, videos_per_channel).astype(np.int64)
+    published.sort()
+    reach = (rng.pareto(1.3, videos_per_channel) + 1) * rng.lognormal(7, 1)   # final views
+    half_life_hours = rng.lognormal(np.log(48), 0.8, videos_per_channel)
+    like_rate = rng.uniform(0.02, 0.08, videos_per_channel)
+    comment_rate = rng.uniform(0.005, 0.02, videos_per_channel)
+    dislike_rate = rng.uniform(0.001, 0.005, videos_per_channel)
+
+    age_hours = (grid[None, :] - published[:, None]) / 3600
+    live = age_hours >= 0
+    curve = 1 - np.exp(-np.clip(age_hours, 0, None) / half_life_hours[:, None])
+    noise = rng.normal(1, 0.02, curve.shape)
+    # Occasional viral bursts so the anomaly detector has something to find
+    noise[rng.random(curve.shape) < 0.0005] *= 1.5
+    views = np.maximum.accumulate(np.floor(reach[:, None] * curve * noise), axis=1).astype(np.int64)
+    views[~live] = 0
+
+    rows, cols = np.nonzero(live)
+    v = views[rows, cols]
+    video_ids = np.char.add(f"{channel_id}_v", np.char.zfill(np.arange(videos_per_channel).astype(str), 5))
+    titles = _make_titles(rng, videos_per_channel)
+    video_columns = {
+        "channel_id": np.full(len(rows), channel_id, dtype=object),
+        "video_id": video_ids[rows],
+        "title": titles[rows],
+        "published_at": _timestamps(published)[rows],
+        "views": v,
+        "likes": (v * like_rate[rows]).astype(np.int64),
+        "dislikes": (v * dislike_rate[rows]).astype(np.int64),
+        "comments": (v * comment_rate[rows]).astype(np.int64),
+        "fetched_at": _timestamps(grid)[cols],
+    }
+
+    # ---- Channel: subscribers follow views with a noisy conversion rate ----
+    total_views = views.sum(axis=0) + int(rng.lognormal(11, 1))
+    sub_rate = rng.uniform(0.005, 0.03)
+    subscribers = np.maximum.accumulate(
+        (total_views * sub_rate * rng.normal(1, 0.01, n_snap)).astype(np.int64) + int(rng.lognormal(6, 1))
+    )
+    channel_columns = {
+        "channel_id": np.full(n_snap, channel_id, dtype=object),
+        "channel_name": np.full(n_snap, channel_name, dtype=object),
+        "subscribers": subscribers,
+        "total_views": total_views,
+        "total_videos": live.sum(axis=0) + int(rng.integers(5, 50)),
+        "dislikes": rng.integers(0, 50, n_snap),
+        "fetched_at": _timestamps(grid),
+    }
+    return channel_columns, video_columns
+
+
+def _insert(conn, table, columns, data):
+    """Bulk insert column arrays with one executemany"""
+    placeholders = ", ".join("?" for _ in columns)
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+        zip(*(data[c].tolist() for c in columns)),
+    )
+
+
+def generate_demo_data(channels=1, videos_per_channel=15, snapshot_hours=24, days=30,
+                       chunk_rows=250_000, seed=None, refresh=True):
+    """Generate realistic demo data and stream it into SQLite
+
+    refresh=False leaves the rollup tables for the caller to build.
+    """
+    rng = np.random.default_rng(seed)
+    started = time.time()
+
     # Clear existing data
-    with engine.connect() as conn:
+    with get_engine().begin() as conn:
         conn.execute(text("DELETE FROM channel_stats"))
         conn.execute(text("DELETE FROM video_stats"))
-        conn.commit()
-    
+        reset_rollups(conn)
+        reset_alerts(conn)
+        conn.execute(text("DELETE FROM insight_snapshots"))
+        conn.execute(text("DELETE FROM comments"))
+        conn.execute(text("DELETE FROM comment_progress"))
+
     print("🧹 Cleared existing data")
-    
-    # Generate channel stats history (simulating growth over 30 days)
-    base_subs = 5000
-    base_views = 150000
-    channel_history = []
-    
-    for i in range(30):
-        date = datetime.now() - timedelta(days=30-i)
-        growth = i * random.randint(50, 150)
-        channel_history.append({
-            "channel_name": "Demo Channel",
-            "subscribers": base_subs + growth,
-            "total_views": base_views + (growth * 30),
-            "total_videos": 25 + (i // 5),
-            "dislikes": random.randint(0, 50),
-            "fetched_at": date
-        })
-    
-    df_channel = pd.DataFrame(channel_history)
-    df_channel.to_sql("channel_stats", engine, if_exists="append", index=False)
-    print(f"✅ Inserted {len(channel_history)} channel stat records")
-    
-    # Generate video stats
-    video_titles = [
-        "🚀 Getting Started with Python - Complete Tutorial",
-        "🔥 Top 10 VS Code Extensions You NEED",
-        "💡 Machine Learning for Beginners",
-        "🎯 How I Built My First App in 24 Hours",
-        "⚡ JavaScript Tips That Will Blow Your Mind",
-        "🌟 The Future of AI - What You Need to Know",
-        "🔧 Docker Tutorial for Beginners",
-        "📊 Data Visualization with Python",
-        "🎨 CSS Tricks for Modern Websites",
-        "🛠️ Git & GitHub Crash Course",
-        "🤖 Building a Chatbot from Scratch",
-        "📱 React Native vs Flutter - Which is Better?",
-        "🔐 Web Security Best Practices",
-        "☁️ AWS for Beginners - Cloud Computing 101",
-        "🎬 Video Editing with Python"
-    ]
-    
-    videos = []
-    for i, title in enumerate(video_titles):
-        published = datetime.now() - timedelta(days=random.randint(1, 90))
-        views = random.randint(500, 50000)
-        videos.append({
-            "video_id": f"demo_vid_{i:03d}",
-            "title": title,
-            "published_at": published,
-            "views": views,
-            "likes": int(views * random.uniform(0.02, 0.08)),
-            "dislikes": int(views * random.uniform(0.001, 0.005)),
-            "comments": int(views * random.uniform(0.005, 0.02)),
-            "fetched_at": datetime.now()
-        })
-    
-    df_videos = pd.DataFrame(videos)
-    df_videos.to_sql("video_stats", engine, if_exists="append", index=False)
-    print(f"✅ Inserted {len(videos)} video records")
-    
+
+    end = int(time.time())
+    n_snap = max(int(days * 24 / snapshot_hours), 1)
+    grid = end - (n_snap - 1 - np.arange(n_snap, dtype=np.int64)) * int(snapshot_hours * 3600)
+
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA synchronous = OFF")
+    # Raw-table indexes are rebuilt once at the end instead of on every insert
+    index_names = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name IN ('channel_stats', 'video_stats') "
+        "AND sql IS NOT NULL")]
+    for name in index_names:
+        conn.execute(f"DROP INDEX {name}")
+
+    channel_total = video_total = 0
+    pending, pending_rows = [], 0
+    for i in range(channels):
+        channel_id = DEMO_CHANNEL_ID if channels == 1 else f"{DEMO_CHANNEL_ID}_{i:04d}"
+        channel_name = "Demo Channel" if channels == 1 else f"Demo Channel {i + 1:04d}"
+        channel_cols, video_cols = generate_channel(rng, channel_id, channel_name, grid, videos_per_channel, days * 2)
+        pending.append((channel_cols, video_cols))
+        pending_rows += len(video_cols["views"])
+
+        if pending_rows >= chunk_rows or i == channels - 1:
+            with conn:
+                for channel_cols, video_cols in pending:
+                    _insert(conn, "channel_stats", CHANNEL_COLUMNS, channel_cols)
+                    _insert(conn, "video_stats", VIDEO_COLUMNS, video_cols)
+                    channel_total += len(channel_cols["subscribers"])
+                    video_total += len(video_cols["views"])
+            pending, pending_rows = [], 0
+            print(f"   ... {i + 1}/{channels} channels, {video_total:,} video snapshots "
+                  f"({time.time() - started:.0f}s)")
+    conn.close()
+
+    print(f"✅ Inserted {channel_total:,} channel stat records")
+    print(f"✅ Inserted {video_total:,} video records")
+
+    init_database()
+    print("✅ Rebuilt indexes")
+
+    if refresh:
+        refresh_rollups()
+        print(f"✅ Refreshed channel rollups ({time.time() - started:.0f}s total)")
+
     print(f"\n📁 Demo data saved to: {DB_PATH}")
     print("\n🎉 You can now run the dashboard:")
     print("   streamlit run youtube_dashboard.py")
 
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic YouTube analytics data")
+    parser.add_argument("--channels", type=int, default=1, help="number of channels (default: 1)")
+    parser.add_argument("--videos-per-channel", type=int, default=15, help="videos per channel (default: 15)")
+    parser.add_argument("--snapshot-hours", type=float, default=24, help="hours between snapshots (default: 24)")
+    parser.add_argument("--days", type=float, default=30, help="days of snapshot history (default: 30)")
+    parser.add_argument("--chunk-rows", type=int, default=250_000, help="rows per insert transaction")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible data")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_args()
     print("🎬 YouTube Analytics Dashboard - Demo Data Generator")
     print("=" * 50)
     init_database()
-    generate_demo_data()
+    generate_demo_data(args.channels, args.videos_per_channel, args.snapshot_hours, args.days,
+                       args.chunk_rows, args.seed)
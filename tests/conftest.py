@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import youtube_db
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh, initialized database at a temp YOUTUBE_DB_PATH; yields its engine"""
+    path = str(tmp_path / "youtube_data.db")
+    monkeypatch.setenv("YOUTUBE_DB_PATH", path)   # for spawned processes
+    monkeypatch.setattr(youtube_db, "DB_PATH", path)
+    monkeypatch.setattr(youtube_db, "_engine", None)
+    youtube_db.init_database()
+    engine = youtube_db.get_engine()
+    yield engine
+    engine.dispose()
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import text
+
+from youtube_alerts import detect_anomalies
+
+START = datetime(2024, 1, 1)
+
+
+def _channel_rows(hours):
+    # Steady growth with a little noise, then one burst of new subscribers
+    rows = []
+    subscribers = 1000
+    for hour in range(hours):
+        subscribers += 2000 if hour == 20 else 100 + hour % 3 * 5
+        rows.append({"subscribers": subscribers, "total_views": subscribers * 50,
+                     "fetched_at": str(START + timedelta(hours=hour))})
+    return rows
+
+
+def _insert(conn, rows):
+    conn.execute(text("""
+        INSERT INTO channel_stats (channel_id, subscribers, total_views, fetched_at)
+        VALUES ('c1', :subscribers, :total_views, :fetched_at)
+    """), rows)
+
+
+def _alerts(conn):
+    return pd.read_sql("""
+        SELECT entity_id, metric, kind, observed, expected, zscore, snapshot_at
+        FROM alerts ORDER BY snapshot_at, metric, kind
+    """, conn)
+
+
+def _state(conn):
+    return pd.read_sql("SELECT * FROM detector_state ORDER BY entity_id, metric", conn)
+
+
+def test_resuming_from_the_watermark_matches_one_pass(db):
+    rows = _channel_rows(30)
+    with db.begin() as conn:
+        _insert(conn, rows)
+        detect_anomalies(conn)
+        one_pass, one_pass_state = _alerts(conn), _state(conn)
+        conn.execute(text("DELETE FROM channel_stats"))
+        conn.execute(text("DELETE FROM alerts"))
+        conn.execute(text("DELETE FROM detector_state"))
+        conn.execute(text("DELETE FROM rollup_state"))
+
+        # Same snapshots arriving over three runs, read in small batches
+        for part in (rows[:12], rows[12:21], rows[21:]):
+            _insert(conn, part)
+            detect_anomalies(conn, batch_size=4)
+        resumed, resumed_state = _alerts(conn), _state(conn)
+
+    assert ((one_pass["kind"] == "spike") & (one_pass["snapshot_at"] == rows[20]["fetched_at"])).any()
+    pd.testing.assert_frame_equal(one_pass, resumed)
+    pd.testing.assert_frame_equal(one_pass_state, resumed_state)
+
+
+def test_rerun_without_new_snapshots_adds_no_alerts(db):
+    with db.begin() as conn:
+        _insert(conn, _channel_rows(30))
+        first = detect_anomalies(conn)
+        assert first > 0
+        assert detect_anomalies(conn) == 0
+        assert conn.execute(text("SELECT COUNT(*) FROM alerts")).scalar() == first
+
+
+def test_watermark_moves_past_snapshots_without_metrics(db):
+    with db.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO channel_stats (channel_id, subscribers, total_views, fetched_at)
+            VALUES ('c1', NULL, NULL, '2024-01-01 00:00:00')
+        """))
+        detect_anomalies(conn)
+        last_id = conn.execute(text("SELECT MAX(id) FROM channel_stats")).scalar()
+        watermark = conn.execute(text("SELECT last_id FROM rollup_state WHERE name = 'alerts_channel'")).scalar()
+    assert watermark == last_id
@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import bindparam, text
+
+import youtube_comments as comments
+import youtube_fetch
+from fake_youtube_api import comment_threads, start_server
+
+VIDEO_ID = "vid1"   # 236 threads on the fake API: three pages of 100
+
+
+@pytest.fixture
+def youtube(monkeypatch):
+    server, endpoint = start_server()
+    monkeypatch.setattr(youtube_fetch, "API_ENDPOINT", endpoint)
+    yield youtube_fetch.build_client("fake")
+    server.shutdown()
+
+
+def _total_threads():
+    items, _ = comment_threads(VIDEO_ID, None, 10_000)
+    return len(items)
+
+
+def _progress(db):
+    with db.connect() as conn:
+        return conn.execute(text("""
+            SELECT next_page_token, pages, completed_at, refresh FROM comment_progress WHERE video_id = :video_id
+        """), {"video_id": VIDEO_ID}).one()
+
+
+def _stored(db):
+    with db.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM comments WHERE video_id = :video_id"),
+                            {"video_id": VIDEO_ID}).scalar()
+
+
+def test_resumes_from_the_saved_page_token(db, youtube):
+    assert comments.fetch_video_comments(youtube, VIDEO_ID, max_pages=1) == comments.PAGE_SIZE
+    progress = _progress(db)
+    assert progress.next_page_token == str(comments.PAGE_SIZE)
+    assert progress.completed_at is None
+
+    added = comments.fetch_video_comments(youtube, VIDEO_ID)
+
+    total = _total_threads()
+    assert added == total - comments.PAGE_SIZE
+    assert _stored(db) == total
+    progress = _progress(db)
+    assert progress.pages == 3   # the first page was not read again
+    assert progress.next_page_token is None and progress.completed_at is not None
+
+
+def test_refresh_stops_at_the_first_stored_thread(db, youtube):
+    comments.fetch_video_comments(youtube, VIDEO_ID)
+    # Forget the five newest threads, as if they were posted after the first walk
+    with db.begin() as conn:
+        newest = [item["id"] for item in comment_threads(VIDEO_ID, None, 5)[0]]
+        conn.execute(text("DELETE FROM comments WHERE thread_id IN :ids")
+                     .bindparams(bindparam("ids", expanding=True)), {"ids": newest})
+    pages = _progress(db).pages
+
+    assert comments.fetch_video_comments(youtube, VIDEO_ID) == 0   # finished videos need refresh=True
+    assert comments.fetch_video_comments(youtube, VIDEO_ID, refresh=True) == 5
+
+    assert _stored(db) == _total_threads()
+    assert _progress(db).pages == pages + 1
+
+
+def test_interrupted_refresh_resumes_as_a_refresh(db, youtube):
+    comments.fetch_video_comments(youtube, VIDEO_ID)
+    with db.begin() as conn:
+        conn.execute(text("""
+            UPDATE comment_progress SET completed_at = NULL, next_page_token = :token, refresh = 1
+            WHERE video_id = :video_id
+        """), {"video_id": VIDEO_ID, "token": str(comments.PAGE_SIZE)})
+    pages = _progress(db).pages
+
+    assert comments.fetch_video_comments(youtube, VIDEO_ID) == 0
+
+    progress = _progress(db)
+    assert progress.pages == pages + 1   # stopped on the first page of stored threads
+    assert progress.completed_at is not None and not progress.refresh
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import text
+
+import youtube_fetch
+import youtube_ingest
+from fake_youtube_api import start_server
+
+
+@pytest.fixture
+def fake_api(db, monkeypatch):
+    """Point the parent and the spawned fetch workers at the fake API and the temp database"""
+    server, endpoint = start_server()
+    monkeypatch.setenv("YOUTUBE_API_ENDPOINT", endpoint)
+    monkeypatch.setenv("YOUTUBE_API_KEY", "fake")
+    monkeypatch.setattr(youtube_ingest, "API_KEY", "fake")
+    monkeypatch.setattr(youtube_ingest, "DB_PATH", str(db.url.database))
+    monkeypatch.setattr(youtube_fetch, "API_KEY", "fake")
+    monkeypatch.setattr(youtube_fetch, "API_ENDPOINT", endpoint)
+    yield endpoint
+    server.shutdown()
+
+
+def _count(db, table):
+    with db.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+
+@pytest.mark.parametrize("sweep", [youtube_ingest.ingest_parallel, youtube_fetch.fetch_youtube_data])
+def test_sweep_without_channels_fails(fake_api, monkeypatch, sweep):
+    monkeypatch.setattr(youtube_ingest, "CHANNEL_IDS", [])
+    monkeypatch.setattr(youtube_fetch, "CHANNEL_IDS", [])
+    statuses = []
+
+    assert sweep([], statuses.append) is False
+    assert statuses[-1]["errors"] == [youtube_fetch.NO_CHANNELS]
+
+
+def test_parallel_sweep_writes_every_channel(db, fake_api):
+    assert youtube_ingest.ingest_parallel(["c1", "c2", "c3"], workers=2) is True
+    assert _count(db, "channel_stats") == 3
+    assert _count(db, "video_latest") == _count(db, "video_stats") > 0
+
+
+def test_parallel_sweep_fails_when_the_writer_fails(db, fake_api):
+    with db.begin() as conn:
+        conn.execute(text("""
+            CREATE TRIGGER reject_videos BEFORE INSERT ON video_stats
+            BEGIN SELECT RAISE(ABORT, 'disk full'); END
+        """))
+    statuses = []
+
+    assert youtube_ingest.ingest_parallel(["c1", "c2", "c3"], statuses.append, workers=2) is False
+    assert any(error.startswith("writer:") and "disk full" in error for error in statuses[-1]["errors"])
+    assert _count(db, "channel_stats") == 0   # the failed transaction took the channel rows with it
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import youtube_payload as payload
+
+
+def _high_cardinality_table(rows=60_000, repeated=2_000):
+    # The first rows share a handful of titles, so the sampled estimate is far
+    # too low for the unique titles after them
+    titles = [f"video {i % 10}" if i < repeated else f"A fairly long video title number {i} with extra words"
+              for i in range(rows)]
+    return pd.DataFrame({"title": pd.Categorical(titles), "views": np.arange(rows)})
+
+
+@pytest.mark.parametrize("budget_kb", [1000, 500, 100, 10])
+def test_fit_table_stays_within_budget_with_high_cardinality_categories(budget_kb):
+    df = _high_cardinality_table()
+
+    fitted, size, note = payload.fit_table(df, budget_kb)
+
+    assert size <= budget_kb * 1024
+    assert size == payload.table_bytes(fitted)
+    assert len(fitted) < len(df)
+    assert note == f"showing the first {len(fitted):,} of {len(df):,} rows"
+    # Only the categories of the rows actually sent go into the dictionary
+    assert set(fitted["title"].cat.categories) == set(fitted["title"])
+
+
+def test_fit_table_leaves_small_tables_alone():
+    df = _high_cardinality_table(rows=50, repeated=0)
+
+    fitted, size, note = payload.fit_table(df, 1000)
+
+    assert len(fitted) == len(df)
+    assert note is None
+    assert size == payload.table_bytes(df)
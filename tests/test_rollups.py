@@ -0,0 +1,47 @@
+import pandas as pd
+from sqlalchemy import text
+
+from youtube_rollups import refresh_video_latest
+
+
+def _insert_snapshots(conn, day, videos):
+    conn.execute(text("""
+        INSERT INTO video_stats (channel_id, video_id, title, published_at, views, likes, comments, fetched_at)
+        VALUES ('c1', :video_id, :title, '2024-01-01 00:00:00', :views, :likes, :comments, :fetched_at)
+    """), [{"video_id": video_id, "title": f"Video {video_id}", "views": views, "likes": views // 20,
+            "comments": views // 100, "fetched_at": f"2024-01-{day:02d} {hour:02d}:00:00"}
+           for video_id, hour, views in videos])
+
+
+def _video_latest(conn):
+    return pd.read_sql("SELECT * FROM video_latest ORDER BY video_id", conn)
+
+
+def test_incremental_refresh_matches_full_rebuild(db):
+    with db.begin() as conn:
+        # First batch: several snapshots per video, one video seen only once
+        _insert_snapshots(conn, 2, [("a", 0, 100), ("b", 0, 50), ("a", 6, 400), ("b", 6, 90), ("c", 12, 10)])
+        refresh_video_latest(conn)
+        # Second batch: one snapshot for some videos (paired with video_latest), two for another, a new video
+        _insert_snapshots(conn, 3, [("a", 0, 900), ("c", 0, 70), ("c", 6, 200), ("d", 6, 5)])
+        refresh_video_latest(conn)
+        incremental = _video_latest(conn)
+
+        conn.execute(text("DELETE FROM video_latest"))
+        conn.execute(text("DELETE FROM rollup_state WHERE name = 'video_latest'"))
+        refresh_video_latest(conn)
+        rebuilt = _video_latest(conn)
+
+    assert list(incremental["video_id"]) == ["a", "b", "c", "d"]
+    pd.testing.assert_frame_equal(incremental, rebuilt)
+    a = incremental.set_index("video_id").loc["a"]
+    assert (a["views"], a["delta_views"], a["delta_hours"]) == (900, 500, 18)
+
+
+def test_refresh_without_new_snapshots_changes_nothing(db):
+    with db.begin() as conn:
+        _insert_snapshots(conn, 2, [("a", 0, 100), ("a", 6, 400)])
+        refresh_video_latest(conn)
+        before = _video_latest(conn)
+        refresh_video_latest(conn)
+        pd.testing.assert_frame_equal(before, _video_latest(conn))
@@ -0,0 +1,166 @@
+"""
+Streaming Anomaly Detection for YouTube Analytics Dashboard
+Every new snapshot updates a small per-channel / per-video detector state in
+O(1): Holt smoothing forecasts the counter's growth rate, an EWMA of squared
+residuals gives its spread, and the z-scored residual feeds spike/drop checks
+and a two-sided CUSUM for subscriber-growth trend changes. Anything flagged is
+written to the alerts table, so the dashboard only has to read it.
+"""
+
+from datetime import datetime
+from sqlalchemy import text, bindparam
+
+# ----------------- DETECTOR TUNING -----------------
+ALPHA = 0.3          # Holt level smoothing
+BETA = 0.1           # Holt trend smoothing
+VAR_ALPHA = 0.1      # EWMA weight for the residual variance
+WARMUP = 5           # observations before any alert can fire
+Z_THRESHOLD = 3.0    # |z| above this is a spike / drop
+CUSUM_K = 0.5        # CUSUM slack, in standard deviations
+CUSUM_H = 5.0        # CUSUM decision threshold
+
+# (entity_type, source table, id column, counters watched, counters with trend alerts)
+SOURCES = [
+    ("channel", "channel_stats", "channel_id", ["subscribers", "total_views"], ["subscribers"]),
+    ("video", "video_stats", "video_id", ["views"], []),
+]
+
+STATE_COLUMNS = ["last_value", "last_at", "level", "trend", "var", "cusum_pos", "cusum_neg", "n"]
+
+
+def _parse_ts(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+def new_state():
+    return {"last_value": None, "last_at": None, "level": 0.0, "trend": 0.0, "var": 0.0,
+            "cusum_pos": 0.0, "cusum_neg": 0.0, "n": 0}
+
+
+def update_state(state, value, at, track_trend=False):
+    """Fold one counter observation into state; returns a list of (kind, rate, expected, z)"""
+    at = _parse_ts(at)
+    if state["last_value"] is None:
+        state["last_value"], state["last_at"] = value, at
+        return []
+    last_at = _parse_ts(state["last_at"])
+    hours = (at - last_at).total_seconds() / 3600
+    if hours <= 0:
+        return []
+    rate = (value - state["last_value"]) / hours
+    state["last_value"], state["last_at"] = value, at
+
+    # First rate just seeds the level
+    if state["n"] == 0:
+        state["level"], state["n"] = rate, 1
+        return []
+
+    expected = state["level"] + state["trend"]
+    residual = rate - expected
+    std = state["var"] ** 0.5
+    z = residual / std if std > 0 else 0.0
+
+    alerts = []
+    if state["n"] >= WARMUP and std > 0:
+        if z > Z_THRESHOLD:
+            alerts.append(("spike", rate, expected, z))
+        elif z < -Z_THRESHOLD:
+            alerts.append(("drop", rate, expected, z))
+        if track_trend:
+            # Clip z so a single spike cannot trip the CUSUM on its own
+            zc = max(-Z_THRESHOLD, min(Z_THRESHOLD, z))
+            state["cusum_pos"] = max(0.0, state["cusum_pos"] + zc - CUSUM_K)
+            state["cusum_neg"] = max(0.0, state["cusum_neg"] - zc - CUSUM_K)
+            if state["cusum_pos"] > CUSUM_H:
+                alerts.append(("trend_up", rate, expected, z))
+                state["cusum_pos"] = 0.0
+            elif state["cusum_neg"] > CUSUM_H:
+                alerts.append(("trend_down", rate, expected, z))
+                state["cusum_neg"] = 0.0
+
+    # Outliers are clipped before they reach the level and variance, so a
+    # one-off spike neither drags the forecast nor masks the next anomaly
+    clipped = residual if std == 0 else max(-Z_THRESHOLD * std, min(Z_THRESHOLD * std, residual))
+    level = expected + ALPHA * clipped
+    state["trend"] = BETA * (level - state["level"]) + (1 - BETA) * state["trend"]
+    state["level"] = level
+    state["var"] = (1 - VAR_ALPHA) * state["var"] + VAR_ALPHA * clipped ** 2
+    state["n"] += 1
+    return alerts
+
+
+def _load_states(conn, entity_type, entity_ids, chunk=500):
+    """Fetch stored detector state for just the entities seen in a batch"""
+    states = {}
+    entity_ids = list(entity_ids)
+    for start in range(0, len(entity_ids), chunk):
+        rows = conn.execute(text(f"""
+            SELECT entity_id, metric, {", ".join(STATE_COLUMNS)}
+            FROM detector_state
+            WHERE entity_type = :entity_type AND entity_id IN :entity_ids
+        """).bindparams(bindparam("entity_ids", expanding=True)),
+            {"entity_type": entity_type, "entity_ids": entity_ids[start:start + chunk]})
+        states.update({(row[0], row[1]): dict(zip(STATE_COLUMNS, row[2:])) for row in rows})
+    return states
+
+
+def detect_anomalies(conn, batch_size=50000):
+    """Run the detectors over snapshots added since the last call; returns the number of alerts"""
+    total_alerts = 0
+    for entity_type, table, id_col, metrics, trend_metrics in SOURCES:
+        watermark_name = f"alerts_{entity_type}"
+        watermark = conn.execute(text("SELECT last_id FROM rollup_state WHERE name = :name"),
+                                 {"name": watermark_name}).scalar() or 0
+        start = watermark
+        states = {}
+        loaded = set()
+        touched = set()
+        alerts = []
+        while True:
+            rows = conn.execute(text(f"""
+                SELECT id, {id_col}, channel_id, fetched_at, {", ".join(metrics)}
+                FROM {table}
+                WHERE id > :watermark AND {id_col} IS NOT NULL
+                ORDER BY id
+                LIMIT :batch_size
+            """), {"watermark": watermark, "batch_size": batch_size}).fetchall()
+            if not rows:
+                break
+            unseen = {row[1] for row in rows} - loaded
+            states.update(_load_states(conn, entity_type, unseen))
+            loaded |= unseen
+            for row in rows:
+                entity_id, channel_id, fetched_at = row[1], row[2], row[3]
+                for metric, value in zip(metrics, row[4:]):
+                    if value is None:
+                        continue
+                    key = (entity_id, metric)
+                    state = states.setdefault(key, new_state())
+                    touched.add(key)
+                    for kind, rate, expected, z in update_state(state, value, fetched_at, metric in trend_metrics):
+                        alerts.append({
+                            "entity_type": entity_type, "entity_id": entity_id, "channel_id": channel_id,
+                            "metric": metric, "kind": kind, "observed": rate, "expected": expected,
+                            "zscore": z, "snapshot_at": str(fetched_at),
+                        })
+            watermark = rows[-1][0]
+
+        if touched:
+            conn.execute(text(f"""
+                INSERT OR REPLACE INTO detector_state (entity_type, entity_id, metric, {", ".join(STATE_COLUMNS)})
+                VALUES (:entity_type, :entity_id, :metric, {", ".join(":" + c for c in STATE_COLUMNS)})
+            """), [{"entity_type": entity_type, "entity_id": key[0], "metric": key[1],
+                    **{**states[key], "last_at": str(states[key]["last_at"])}} for key in touched])
+        if alerts:
+            conn.execute(text("""
+                INSERT INTO alerts (entity_type, entity_id, channel_id, metric, kind, observed, expected, zscore, snapshot_at)
+                VALUES (:entity_type, :entity_id, :channel_id, :metric, :kind, :observed, :expected, :zscore, :snapshot_at)
+            """), alerts)
+        # Rows with only NULL metrics still move the watermark, or every run would rescan them
+        if watermark != start:
+            conn.execute(text("INSERT OR REPLACE INTO rollup_state (name, last_id) VALUES (:name, :last_id)"),
+                         {"name": watermark_name, "last_id": watermark})
+        total_alerts += len(alerts)
+    return total_alerts
@@ -1,80 +1,46 @@
-from googleapiclient.discovery import build
-import pandas as pd
-import os
-from dotenv import load_dotenv
+"""
+Export a channel's latest videos to CSV
+Thin CLI wrapper around the fetch library in youtube_fetch.py:
 
-# Load environment variables from .env file
-load_dotenv()
+    python youtube_analytics.py [--channel ID] [--max-videos 10] [--out youtube_channel_analytics.csv]
+"""
 
-# ----------------- CONFIG -----------------
-API_KEY = os.getenv("YOUTUBE_API_KEY", "")
-CHANNEL_ID = os.getenv("YOUTUBE_CHANNEL_ID", "UCv-yOn6QFBonsVyotOYmQCw")
-MAX_VIDEOS = 10                  # Number of latest videos to fetch
+import argparse
+from youtube_fetch import API_KEY, CHANNEL_IDS, build_client, fetch_channel
 
-if not API_KEY or not CHANNEL_ID:
-    raise ValueError("Missing YOUTUBE_API_KEY or YOUTUBE_CHANNEL_ID in .env file")
+DEFAULT_CHANNEL_ID = CHANNEL_IDS[0] if CHANNEL_IDS else "UCv-yOn6QFBonsVyotOYmQCw"
+CSV_COLUMNS = ["video_id", "title", "published_at", "views", "likes", "comments"]
 
-# Build YouTube API client
-youtube = build("youtube", "v3", developerKey=API_KEY)
 
-# ----------------- STEP 1: Channel Stats -----------------
-channel_request = youtube.channels().list(
-    part="snippet,statistics",
-    id=CHANNEL_ID
-)
-channel_response = channel_request.execute()
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export a channel's latest video stats to CSV")
+    parser.add_argument("--channel", default=DEFAULT_CHANNEL_ID, help="channel id (default: first YOUTUBE_CHANNEL_ID)")
+    parser.add_argument("--max-videos", type=int, default=10, help="number of latest videos to fetch (default: 10)")
+    parser.add_argument("--out", default="youtube_channel_analytics.csv", help="CSV file to write")
+    return parser.parse_args(argv)
 
-channel_data = channel_response["items"][0]
 
-channel_stats = {
-    "channel_name": channel_data["snippet"]["title"],
-    "subscribers": int(channel_data["statistics"]["subscriberCount"]),
-    "total_views": int(channel_data["statistics"]["viewCount"]),
-    "total_videos": int(channel_data["statistics"]["videoCount"])
-}
+def main(argv=None):
+    args = parse_args(argv)
+    if not API_KEY or not args.channel:
+        raise SystemExit("Missing YOUTUBE_API_KEY or YOUTUBE_CHANNEL_ID in .env file")
 
-print("Channel Stats:")
-print(channel_stats)
+    import pandas as pd
+    result = fetch_channel(build_client(), args.channel, args.max_videos)
+    if result is None:
+        raise SystemExit(1)
+    channel_stats, videos = result
 
-# ----------------- STEP 2: Fetch Latest Videos -----------------
-video_request = youtube.search().list(
-    part="snippet",
-    channelId=CHANNEL_ID,
-    maxResults=MAX_VIDEOS,
-    order="date"
-)
-video_response = video_request.execute()
+    print("Channel Stats:")
+    print(channel_stats)
 
-video_list = []
+    df_videos = pd.DataFrame(videos, columns=CSV_COLUMNS)
+    print("\nLatest Video Stats:")
+    print(df_videos)
 
-for item in video_response["items"]:
-    video_id = item["id"]["videoId"]
-    title = item["snippet"]["title"]
-    published_at = item["snippet"]["publishedAt"]
+    df_videos.to_csv(args.out, index=False)
+    print(f"\n✅ CSV file '{args.out}' created successfully!")
 
-    # ----------------- STEP 3: Fetch Video Stats -----------------
-    stats_request = youtube.videos().list(
-        part="statistics",
-        id=video_id
-    )
-    stats_response = stats_request.execute()
-    stats = stats_response["items"][0]["statistics"]
 
-    video_list.append({
-        "video_id": video_id,
-        "title": title,
-        "published_at": published_at,
-        "views": int(stats.get("viewCount", 0)),
-        "likes": int(stats.get("likeCount", 0)),
-        "comments": int(stats.get("commentCount", 0))
-    })
-
-# Convert to DataFrame
-df_videos = pd.DataFrame(video_list)
-
-print("\nLatest Video Stats:")
-print(df_videos)
-
-# ----------------- STEP 4: Export to CSV -----------------
-df_videos.to_csv("youtube_channel_analytics.csv", index=False)
-print("\n✅ CSV file 'youtube_channel_analytics.csv' created successfully!")
+if __name__ == "__main__":
+    main()
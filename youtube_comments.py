@@ -0,0 +1,189 @@
+"""
+Comment Thread Ingestion for YouTube Analytics Dashboard
+Walks commentThreads().list page by page for selected videos and writes each
+page straight into the comments table, so memory stays at one page (100
+threads) however many comments a video has. The next page token is saved in
+the same transaction as the page, so an interrupted run resumes exactly where
+it stopped, and threads that are already stored are skipped.
+
+    python youtube_comments.py                            # top 20 videos by views
+    python youtube_comments.py --videos abc123,def456 --max-pages 5
+    python youtube_comments.py --channel UC123 --top 50 --refresh
+    python youtube_comments.py --refresh --recheck-disabled   # also retry videos with comments off
+"""
+
+import argparse
+from youtube_db import get_engine, init_database
+from youtube_fetch import API_KEY, build_client, execute
+from youtube_metrics import ROWS_WRITTEN, ROWS_SKIPPED
+import youtube_trace as trace
+
+PAGE_SIZE = 100  # API maximum for commentThreads.list
+
+
+def _timestamp(value):
+    """RFC 3339 API time -> 'YYYY-MM-DD HH:MM:SS', matching SQLite's CURRENT_TIMESTAMP"""
+    return value.replace("T", " ")[:19] if value else None
+
+
+def thread_row(item):
+    """comments row for one commentThread resource"""
+    snippet = item["snippet"]
+    top = snippet["topLevelComment"]["snippet"]
+    return {
+        "thread_id": item["id"],
+        "video_id": snippet.get("videoId"),
+        "channel_id": snippet.get("channelId"),
+        "author": top.get("authorDisplayName"),
+        "text": top.get("textDisplay"),
+        "like_count": int(top.get("likeCount", 0)),
+        "reply_count": int(snippet.get("totalReplyCount", 0)),
+        "published_at": _timestamp(top.get("publishedAt")),
+        "updated_at": _timestamp(top.get("updatedAt")),
+    }
+
+
+def _comments_disabled(error):
+    content = getattr(error, "content", b"") or b""
+    return b"commentsDisabled" in content or "commentsDisabled" in str(error)
+
+
+def save_page(video_id, rows, next_page_token, stop_on_duplicate=False, status="ok"):
+    """Insert one page of threads and advance the video's progress in one transaction
+
+    Returns (inserted, done). With stop_on_duplicate the walk is considered done
+    as soon as a page contains a stored thread (pages come newest first); the
+    flag is saved with the progress so an interrupted refresh resumes as one.
+    """
+    from sqlalchemy import text
+    with get_engine().begin() as conn:
+        inserted = 0
+        if rows:
+            before = conn.execute(text("SELECT total_changes()")).scalar()
+            conn.execute(text("""
+                INSERT OR IGNORE INTO comments (thread_id, video_id, channel_id, author, text, like_count,
+                                                reply_count, published_at, updated_at)
+                VALUES (:thread_id, :video_id, :channel_id, :author, :text, :like_count,
+                        :reply_count, :published_at, :updated_at)
+            """), rows)
+            inserted = conn.execute(text("SELECT total_changes()")).scalar() - before
+        done = next_page_token is None or (stop_on_duplicate and inserted < len(rows))
+        conn.execute(text("""
+            INSERT INTO comment_progress (video_id, next_page_token, pages, threads, completed_at, status, refresh,
+                                          updated_at)
+            VALUES (:video_id, :token, 1, :inserted, CASE WHEN :done THEN CURRENT_TIMESTAMP END, :status, :refresh,
+                    CURRENT_TIMESTAMP)
+            ON CONFLICT (video_id) DO UPDATE SET
+                next_page_token = excluded.next_page_token,
+                pages = comment_progress.pages + 1,
+                threads = comment_progress.threads + excluded.threads,
+                completed_at = excluded.completed_at,
+                status = excluded.status,
+                refresh = excluded.refresh,
+                updated_at = CURRENT_TIMESTAMP
+        """), {"video_id": video_id, "token": None if done else next_page_token, "inserted": inserted,
+               "done": done, "status": status, "refresh": int(stop_on_duplicate and not done)})
+    return inserted, done
+
+
+def fetch_video_comments(youtube, video_id, max_pages=None, refresh=False, recheck_disabled=False):
+    """Walk one video's comment threads into SQLite; returns the number of new threads
+
+    A finished video is skipped unless refresh is set, in which case only the
+    pages newer than what is already stored are read. Videos with comments
+    disabled are only asked again with recheck_disabled.
+    """
+    from sqlalchemy import text
+    with get_engine().connect() as conn:
+        progress = conn.execute(text("""
+            SELECT next_page_token, completed_at, status, refresh FROM comment_progress WHERE video_id = :video_id
+        """), {"video_id": video_id}).first()
+    completed = progress is not None and progress.completed_at is not None
+    if completed and (not refresh or progress.status == "disabled" and not recheck_disabled):
+        return 0
+    token = None if completed or progress is None else progress.next_page_token
+    # A resumed walk keeps the mode it was started in
+    incremental = completed or (progress is not None and bool(progress.refresh))
+
+    pages = total = 0
+    while max_pages is None or pages < max_pages:
+        params = {"part": "snippet", "videoId": video_id, "maxResults": PAGE_SIZE, "order": "time",
+                  "textFormat": "plainText"}
+        if token:
+            params["pageToken"] = token
+        try:
+            response = execute(youtube.commentThreads().list(**params), "commentThreads.list")
+        except Exception as e:
+            if _comments_disabled(e):
+                save_page(video_id, [], None, status="disabled")
+                print(f"⚠️  Comments are disabled for {video_id}")
+                return total
+            raise
+
+        rows = [thread_row(item) for item in response.get("items", [])]
+        token = response.get("nextPageToken")
+        inserted, done = save_page(video_id, rows, token, stop_on_duplicate=incremental)
+        ROWS_WRITTEN.inc(inserted, table="comments")
+        if len(rows) > inserted:
+            ROWS_SKIPPED.inc(len(rows) - inserted, reason="duplicate_thread")
+        total += inserted
+        pages += 1
+        if done:
+            break
+    return total
+
+
+def select_videos(channel_ids=None, top=20):
+    """Most-viewed video ids from the video_latest rollup, optionally for some channels"""
+    from sqlalchemy import text, bindparam
+    sql = "SELECT video_id FROM video_latest"
+    params = {"top": top}
+    if channel_ids:
+        sql += " WHERE channel_id IN :channel_ids"
+        params["channel_ids"] = list(channel_ids)
+    stmt = text(sql + " ORDER BY views DESC LIMIT :top")
+    if channel_ids:
+        stmt = stmt.bindparams(bindparam("channel_ids", expanding=True))
+    with get_engine().connect() as conn:
+        return [row[0] for row in conn.execute(stmt, params)]
+
+
+def ingest_comments(video_ids=None, channel_ids=None, top=20, max_pages=None, refresh=False, recheck_disabled=False):
+    """Ingest comment threads for video_ids (default: the top videos by views); returns new threads"""
+    init_database()
+    if not API_KEY:
+        print("⚠️  No YOUTUBE_API_KEY found in environment variables!")
+        return 0
+    video_ids = video_ids or select_videos(channel_ids, top)
+    youtube = build_client()
+    total = 0
+    for i, video_id in enumerate(video_ids, 1):
+        try:
+            with trace.span("fetch.comments", video_id=video_id) as span:
+                added = fetch_video_comments(youtube, video_id, max_pages, refresh, recheck_disabled)
+                span.set(rows=added)
+            total += added
+            print(f"💬 [{i}/{len(video_ids)}] {video_id}: {added} new comment threads")
+        except Exception as e:
+            print(f"❌ Error fetching comments for {video_id}: {e}")
+    print(f"✅ {total} new comment threads stored")
+    return total
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest YouTube comment threads into SQLite")
+    parser.add_argument("--videos", default="", help="comma-separated video ids (default: top videos by views)")
+    parser.add_argument("--channel", default="", help="comma-separated channel ids to pick top videos from")
+    parser.add_argument("--top", type=int, default=20, help="number of most-viewed videos (default: 20)")
+    parser.add_argument("--max-pages", type=int, default=None, help="pages per video per run (default: all)")
+    parser.add_argument("--refresh", action="store_true", help="re-walk finished videos for new threads")
+    parser.add_argument("--recheck-disabled", action="store_true",
+                        help="with --refresh, also retry videos whose comments were disabled")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    ingest_comments([v.strip() for v in args.videos.split(",") if v.strip()],
+                    [c.strip() for c in args.channel.split(",") if c.strip()],
+                    args.top, args.max_pages, args.refresh, args.recheck_disabled)
@@ -1,16 +1,57 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from streamlit_autorefresh import st_autorefresh
+from youtube_jobs import start_refresh, get_job, data_version
+from youtube_db import get_engine, init_database
+from youtube_insights import channel_insights, health_message, PERFORMER_COLUMNS
+import youtube_queries as queries
+import youtube_trace as trace
+import youtube_payload as payload
+from youtube_export import EXPORT_TABLES, export_bytes
 from datetime import datetime
 import os
 
+# Copy-on-write lets filtered frames share memory with the cached tables (default in pandas 3)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 # ---- Page Config (MUST BE FIRST) ----
 st.set_page_config(page_title="YouTube Analytics • Modern Premium", layout="wide")
 
 # ---- Sidebar Theme Switcher ----
 theme_mode = st.sidebar.radio("🌈 Select Theme", ["Dark", "Light"])
+view_mode = st.sidebar.radio("🧭 View", ["Channel Dashboard", "Channel Comparison"])
+
+# ---- Debug Timings (spans from youtube_trace.py; nothing is recorded when off) ----
+debug_timings = st.sidebar.checkbox("🐞 Debug timings", value=trace.LOG_ENABLED)
+trace_records = trace.start() if debug_timings else trace.stop()
+
+def render_debug_panel():
+    """Sidebar breakdown of this rerun's SQL / transform / chart spans and the last refresh's API calls"""
+    if trace_records is None:
+        return
+    trace.lap()
+    with st.sidebar.expander("🐞 Timings (this rerun)", expanded=True):
+        summary = pd.DataFrame(trace.summarize(trace_records))
+        if summary.empty:
+            st.caption("No spans recorded (everything came from cache).")
+        else:
+            layers = summary[~summary["span"].str.startswith("section.")]
+            by_layer = layers.groupby(layers["span"].str.split(".").str[0])["total_ms"].sum()
+            st.caption(" • ".join(f"{layer}: {ms:,.0f} ms" for layer, ms in by_layer.items()))
+            sent = payload.section_bytes(trace_records)
+            if sent:
+                st.caption(f"Sent {sum(sent.values()) / 1024:,.0f} KB: " +
+                           " • ".join(f"{section}: {size / 1024:,.1f} KB" for section, size in sent.items()))
+            st.dataframe(summary.round(1), use_container_width=True, hide_index=True)
+        job = get_job()
+        if job is not None and job.spans:
+            api = pd.DataFrame(trace.summarize(job.spans))
+            st.caption(f"Last refresh: {api['quota'].sum():,} quota units • "
+                       f"{api.loc[api['span'].str.startswith('api.'), 'calls'].sum():,} API calls")
+            st.dataframe(api.round(1), use_container_width=True, hide_index=True)
 
 # ---- Theme-Aware Variables ----
 if theme_mode == "Dark":
@@ -123,47 +164,14 @@ st.markdown(f"""
     </style>
 """, unsafe_allow_html=True)
 
-# ---- SQLite Connection (No password needed!) ----
-DB_PATH = os.path.join(os.path.dirname(__file__), "youtube_data.db")
-engine = create_engine(f"sqlite:///{DB_PATH}")
-
-# ---- Initialize Tables if Needed ----
-def init_database():
-    """Create tables if they don't exist"""
-    with engine.connect() as conn:
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS channel_stats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                channel_name TEXT,
-                subscribers INTEGER,
-                total_views INTEGER,
-                total_videos INTEGER,
-                dislikes INTEGER DEFAULT 0,
-                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS video_stats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                video_id TEXT,
-                title TEXT,
-                published_at TIMESTAMP,
-                views INTEGER,
-                likes INTEGER,
-                dislikes INTEGER DEFAULT 0,
-                comments INTEGER,
-                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        conn.commit()
-
+# ---- SQLite Connection & Tables (shared schema in youtube_db.py) ----
 init_database()
 
 # ---- Auto-Fetch Data on Startup (For Streamlit Cloud) ----
 def check_and_fetch_data():
-    """Check if data exists, if not and API key exists, fetch it"""
+    """Check if data exists, if not and API key exists, start a background fetch"""
     try:
-        with engine.connect() as conn:
+        with get_engine().connect() as conn:
             result = conn.execute(text("SELECT COUNT(*) FROM channel_stats")).scalar()
             
         if result == 0:
@@ -171,14 +179,12 @@ def check_and_fetch_data():
             api_key = os.getenv("YOUTUBE_API_KEY") or st.secrets.get("YOUTUBE_API_KEY")
             
             if api_key:
-                st.toast("🚀 Initializing dashboard... Fetching data from YouTube...", icon="⏳")
-                # Import here to avoid circular dependencies
-                from youtube_fetch import fetch_youtube_data
-                success = fetch_youtube_data()
-                if success:
-                    st.toast("✅ Data fetched successfully!", icon="🎉")
-                    st.rerun()
-                else:
+                job = get_job()
+                if job is None or job.running:
+                    _, started = start_refresh()
+                    if started:
+                        st.toast("🚀 Initializing dashboard... Fetching data from YouTube...", icon="⏳")
+                elif job.status == "failed":
                     st.error("Failed to fetch data. Check API Key.")
             else:
                 pass # Will be handled by the "No Data" screen later
@@ -215,21 +221,205 @@ st.markdown(f"""
 </h3>
 """, unsafe_allow_html=True)
 
-# ---- Cached Data Load ----
+# ---- Per-Channel KPIs (pre-aggregated at ingest, see youtube_rollups.py) ----
+trace.lap("section.channel_kpis")
 @st.cache_data(ttl=45)
-def load_tables():
+def load_channel_kpis(version=0):
+    """One indexed read of the channel_kpis rollup table"""
+    try:
+        return queries.load_channel_kpis()
+    except Exception as e:
+        st.warning(f"Channel KPIs unavailable: {e}")
+        return pd.DataFrame()
+
+channel_kpis_df = load_channel_kpis(data_version())
+
+# ---- Monthly Rollup (one grouped query; DuckDB when YOUTUBE_QUERY_BACKEND=duckdb) ----
+@st.cache_data(ttl=45, max_entries=16)
+def load_monthly_rollup(version=0, channel_id=None):
+    """Last subscriber and view counts of each month, per channel"""
+    try:
+        return queries.load_monthly_rollup(channel_id)
+    except Exception as e:
+        st.warning(f"Monthly rollup unavailable: {e}")
+        return pd.DataFrame()
+
+# ---- Channel Comparison View ----
+trace.lap("section.comparison")
+def fixed_chart_layout(fig):
+    fig.update_layout(
+        font_color=AXIS_FONT_COLOR,
+        plot_bgcolor=PLOTLY_BG,
+        paper_bgcolor=PLOTLY_BG,
+        xaxis=dict(color=AXIS_FONT_COLOR, showgrid=False, zeroline=False, tickfont=dict(color=AXIS_FONT_COLOR)),
+        yaxis=dict(color=AXIS_FONT_COLOR, showgrid=False, zeroline=False, tickfont=dict(color=AXIS_FONT_COLOR)),
+        title_font=dict(color=AXIS_FONT_COLOR),
+        legend=dict(font=dict(color=AXIS_FONT_COLOR)),
+        coloraxis_colorbar=dict(tickfont=dict(color=AXIS_FONT_COLOR), title_font=dict(color=AXIS_FONT_COLOR))
+    )
+    return fig
+
+def show_chart(name, fig):
+    """Apply the shared layout, fit the figure to its payload budget (youtube_payload.py) and send it"""
+    with trace.span(f"chart.{name}") as span:
+        fig, size, notes = payload.fit_figure(fixed_chart_layout(fig))
+        span.set(bytes=size)
+        st.plotly_chart(fig, use_container_width=True)
+        if notes:
+            st.caption(f"⚖️ {'; '.join(notes)} to keep this chart under {payload.CHART_BUDGET_KB:,.0f} KB")
+
+def show_table(name, df, **kwargs):
+    """st.dataframe cut to its payload budget; traced with the rows and Arrow bytes sent"""
+    with trace.span(f"table.{name}") as span:
+        df, size, note = payload.fit_table(df)
+        span.set(rows=len(df), bytes=size)
+        st.dataframe(df, use_container_width=True, **kwargs)
+        if note:
+            st.caption(f"⚖️ {note} to keep this table under {payload.TABLE_BUDGET_KB:,.0f} KB")
+
+COMPARISON_METRICS = {
+    "Subscribers": "subscribers",
+    "Views / Video": "views_per_video",
+    "Engagement Rate": "engagement_rate",
+    "Subscriber Growth / Day": "subs_growth_per_day",
+}
+
+if view_mode == "Channel Comparison":
+    st.header("📡 Channel Comparison")
+    if channel_kpis_df.empty:
+        st.info("No channel KPIs yet. Fetch data (or run `python init_demo_data.py`) to populate them.")
+    else:
+        metric_label = st.sidebar.selectbox("Rank channels by", list(COMPARISON_METRICS))
+        metric_col = COMPARISON_METRICS[metric_label]
+        max_channels = st.sidebar.slider("Channels to compare", min_value=1, max_value=max(len(channel_kpis_df), 2),
+                                         value=min(len(channel_kpis_df), 25), key="compare_n")
+        ranked = channel_kpis_df.nlargest(max_channels, metric_col)
+        st.caption(f"{len(channel_kpis_df)} channels tracked • showing top {len(ranked)} by {metric_label.lower()}")
+        fig_rank = px.bar(ranked, x="channel_name", y=metric_col, title=f"Channels by {metric_label}",
+                          template=PLOTLY_THEME, color=metric_col, color_continuous_scale=px.colors.sequential.Agsunset)
+        show_chart("rank", fig_rank)
+        fig_map = px.scatter(ranked, x="views_per_video", y="engagement_rate", size="subscribers",
+                             color="subs_growth_per_day", hover_name="channel_name", template=PLOTLY_THEME,
+                             title="Views per Video vs Engagement (bubble = subscribers)",
+                             color_continuous_scale=px.colors.sequential.PuBuGn)
+        show_chart("map", fig_map)
+        monthly_all = load_monthly_rollup(data_version())
+        if not monthly_all.empty:
+            names = dict(zip(ranked["channel_id"], ranked["channel_name"]))
+            monthly_ranked = monthly_all[monthly_all["channel_id"].isin(list(names))]
+            fig_trend = px.line(monthly_ranked, x="month", y="subscribers",
+                                color=monthly_ranked["channel_id"].map(names).rename("channel"), markers=True,
+                                title="Monthly Subscribers", template=PLOTLY_THEME)
+            show_chart("monthly_compare", fig_trend)
+        show_table("comparison", ranked[["channel_name", "subscribers", "total_views", "total_videos", "views_per_video",
+                                         "engagement_rate", "subs_growth_per_day", "last_fetched_at"]].reset_index(drop=True))
+    render_debug_panel()
+    st_autorefresh(interval=60000, key="refresh")
+    st.stop()
+
+# ---- Channel Picker (only when several channels are tracked) ----
+selected_channel = None
+if len(channel_kpis_df) > 1:
+    channel_names = dict(zip(channel_kpis_df["channel_id"], channel_kpis_df["channel_name"]))
+    selected_channel = st.sidebar.selectbox("📺 Channel", list(channel_names), format_func=channel_names.get)
+
+# ---- Cached Data Load ----
+trace.lap("section.load_tables")
+# Frames come back compact (see youtube_queries.compact_frame) and sorted for slicing.
+# cache_resource hands every session the same frames instead of a pickled copy
+# per rerun; they are never mutated after load (copy-on-write keeps it that way).
+# data_version is only a cache key: a finished background refresh bumps it,
+# which hot-swaps the frames for every session on its next rerun.
+@st.cache_resource(ttl=45, max_entries=8)
+def load_tables(version=0, channel_id=None):
     try:
-        channel_latest = pd.read_sql("SELECT * FROM channel_stats ORDER BY fetched_at DESC LIMIT 1", engine)
-        channel_history = pd.read_sql("SELECT * FROM channel_stats ORDER BY fetched_at ASC", engine)
-        videos = pd.read_sql("SELECT * FROM video_stats ORDER BY fetched_at DESC", engine)
-        return channel_latest, channel_history, videos
+        return queries.load_tables(channel_id)
     except Exception as e:
         st.warning(f"Database empty or error: {e}")
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
-channel_df, channel_history_df, videos_df = load_tables()
+channel_df, channel_history_df, videos_df = load_tables(data_version(), selected_channel)
+
+# ---- Anomaly Alerts (written at ingest by youtube_alerts.py) ----
+@st.cache_data(ttl=45)
+def load_alerts(version=0, channel_id=None, limit=20):
+    """Most recent alerts, newest first"""
+    try:
+        return queries.load_alerts(channel_id, limit)
+    except Exception as e:
+        st.warning(f"Alerts unavailable: {e}")
+        return pd.DataFrame()
+
+# ---- Topics: FTS5 title search & hashtag aggregates (see youtube_topics.py) ----
+@st.cache_data(ttl=45)
+def load_hashtag_stats(version=0, limit=200):
+    """Most-used hashtags with their precomputed aggregates"""
+    try:
+        return queries.load_hashtag_stats(limit)
+    except Exception as e:
+        st.warning(f"Hashtag stats unavailable: {e}")
+        return pd.DataFrame()
+
+@st.cache_data(ttl=45)
+def search_videos(version=0, keywords="", tags=()):
+    """Video ids matching the sidebar topic filters (None when no filter is set)"""
+    return queries.search_videos(keywords, tags)
+
+# ---- Publish-Time Heatmap (one grouped query over video_latest) ----
+def snapshot_version():
+    """Cheap marker that moves whenever new video snapshots are rolled up"""
+    try:
+        return queries.snapshot_version()
+    except Exception:
+        return 0
+
+# No ttl: the cache key changes with the data, so entries never go stale
+@st.cache_data(max_entries=16)
+def load_publish_heatmap(version=0, channel_id=None):
+    """Weekday x hour (UTC) aggregates of latest-snapshot views and engagement"""
+    try:
+        return queries.load_publish_heatmap(channel_id)
+    except Exception as e:
+        st.warning(f"Publish-time stats unavailable: {e}")
+        return pd.DataFrame()
+
+# ---- Trending Videos (video_latest rollup, maintained incrementally at ingest) ----
+@st.cache_data(ttl=45)
+def load_trending(version=0, channel_id=None, limit=10):
+    """Top videos by current views/hour, read straight off the velocity index"""
+    try:
+        return queries.load_trending(channel_id, limit)
+    except Exception as e:
+        st.warning(f"Trending data unavailable: {e}")
+        return pd.DataFrame()
+
+# ---- Insight Snapshots (computed once per sweep, see youtube_insight_snapshots.py) ----
+@st.cache_data(ttl=45, max_entries=16)
+def load_insight_snapshot(version=0, channel_id=None):
+    """Latest ingest-time insight snapshot of a channel (None if there is none)"""
+    try:
+        return queries.load_insight_snapshot(channel_id)
+    except Exception as e:
+        st.warning(f"Insight snapshot unavailable: {e}")
+        return None
+
+@st.cache_data(ttl=45, max_entries=16)
+def load_health_history(version=0, channel_id=None):
+    """Health score components from every insight snapshot of a channel"""
+    try:
+        return queries.load_health_history(channel_id)
+    except Exception as e:
+        st.warning(f"Health history unavailable: {e}")
+        return pd.DataFrame()
+refresh_job = get_job()
 
 # ---- Check if we have data ----
+if channel_df.empty and videos_df.empty and refresh_job is not None and refresh_job.running:
+    st.info(f"⏳ Fetching data from YouTube... {refresh_job.channels_done}/{refresh_job.channels_total} channels, "
+            f"{refresh_job.videos_fetched} videos so far. This page updates automatically.")
+    st_autorefresh(interval=2000, key="refresh")
+    st.stop()
+
 if channel_df.empty and videos_df.empty:
     st.error("""
     ### 📊 No Data Found!
@@ -250,23 +440,15 @@ if channel_df.empty and videos_df.empty:
     st.stop()
 
 # ---- Date & Sidebar Controls ----
+trace.lap("section.sidebar_controls")
 st.sidebar.header("🔎 Filters & Controls")
 st.sidebar.caption("Welcome, legend! Choose your style, set filters & let's analyze 🎨")
 
-# Prepare working copies to avoid modifying cached data
-working_videos = videos_df.copy()
-working_channel_history = channel_history_df.copy()
-
-# Convert date columns
-for df, dcol in [(working_channel_history, "fetched_at"), (working_videos, "fetched_at"), (working_videos, "published_at")]:
-    if dcol in df.columns:
-        df[dcol] = pd.to_datetime(df[dcol], errors='coerce')
-
-date_col = "published_at" if "published_at" in working_videos.columns else "fetched_at"
+date_col = "published_at" if "published_at" in videos_df.columns else "fetched_at"
 
 # Get date range from data
-if date_col in working_videos.columns and not working_videos.empty:
-    valid_dates = working_videos[date_col].dropna()
+if date_col in videos_df.columns and not videos_df.empty:
+    valid_dates = videos_df[date_col].dropna()
     if not valid_dates.empty:
         min_date = valid_dates.min().date()
         max_date = valid_dates.max().date()
@@ -293,42 +475,89 @@ else:
 
 top_n = st.sidebar.slider("Top N Videos to Show", min_value=5, max_value=30, value=10, step=1, key="top_n_slider")
 
+hashtag_stats_df = load_hashtag_stats(data_version())
+search_text = st.sidebar.text_input("🔍 Search titles", key="title_search", placeholder="e.g. python tutorial")
+selected_tags = st.sidebar.multiselect(
+    "#️⃣ Hashtags", hashtag_stats_df["tag"].tolist() if not hashtag_stats_df.empty else [],
+    format_func=lambda tag: f"#{tag}", key="hashtag_filter"
+)
+
+# ---- History Export (streamed from SQLite only when Prepare export is clicked) ----
+with st.sidebar.expander("📥 Export history"):
+    export_table = st.selectbox("Table", list(EXPORT_TABLES), key="export_table")
+    export_columns = st.multiselect("Columns", EXPORT_TABLES[export_table], default=EXPORT_TABLES[export_table],
+                                    key=f"export_columns_{export_table}")
+    export_range = None
+    if not channel_history_df.empty:
+        first_snapshot = channel_history_df["fetched_at"].min().date()
+        last_snapshot = channel_history_df["fetched_at"].max().date()
+        export_range = st.date_input("Snapshot dates", value=[first_snapshot, last_snapshot],
+                                     min_value=first_snapshot, max_value=last_snapshot, key="export_dates")
+    export_start, export_end = export_range if export_range and len(export_range) == 2 else (None, None)
+    export_gzip = st.checkbox("gzip", value=True, key="export_gzip")
+    # The file is only built on request, chunk by chunk from a streaming cursor (never
+    # a DataFrame). The finished bytes stay in this session until the options change:
+    # gzipped they are a fraction of the history, unticked they are the whole CSV.
+    export_options = (export_table, selected_channel, export_start, export_end, tuple(export_columns), export_gzip)
+    if st.button("📦 Prepare export", key="export_prepare"):
+        st.session_state["export_file"] = (export_options, export_bytes(
+            export_table, selected_channel, export_start, export_end, export_columns or None, compress=export_gzip))
+    prepared = st.session_state.get("export_file")
+    if prepared is not None and prepared[0] != export_options:
+        del st.session_state["export_file"]   # stale: free the bytes
+    elif prepared is not None:
+        st.download_button(
+            "⬇️ Download CSV",
+            data=prepared[1],
+            file_name=f"{export_table}{'_' + selected_channel if selected_channel else ''}.csv{'.gz' if export_gzip else ''}",
+            mime="application/gzip" if export_gzip else "text/csv",
+        )
+
 if st.sidebar.button("🔄 Manual Data Refresh"):
     api_key = os.getenv("YOUTUBE_API_KEY") or st.secrets.get("YOUTUBE_API_KEY")
     if api_key:
-        with st.spinner("Fetching latest data from YouTube..."):
-            from youtube_fetch import fetch_youtube_data
-            if fetch_youtube_data():
-                st.toast("Data updated successfully!", icon="✅")
-            else:
-                st.error("Fetch failed. Check code logs.")
-        st.cache_data.clear()
-        st.rerun()
+        refresh_job, started = start_refresh()
+        if started:
+            st.toast("Refresh started in the background!", icon="🔄")
+        else:
+            st.sidebar.info("A refresh is already running.")
     else:
         st.error("No API Key found! Cannot fetch updates.")
-        st.cache_data.clear()
+        load_tables.clear()
         st.rerun()
+
+# ---- Background Refresh Status ----
+if refresh_job is not None:
+    if refresh_job.running:
+        total = max(refresh_job.channels_total, 1)
+        st.sidebar.progress(
+            min(refresh_job.channels_done / total, 1.0),
+            text=f"Fetching... {refresh_job.channels_done}/{refresh_job.channels_total} channels • {refresh_job.videos_fetched} videos"
+        )
+    elif refresh_job.status == "succeeded":
+        st.sidebar.caption(f"✅ Last refresh: {refresh_job.videos_fetched} videos at "
+                           f"{datetime.fromtimestamp(refresh_job.finished_at):%H:%M:%S}")
+    else:
+        st.sidebar.caption(f"❌ Last refresh failed at {datetime.fromtimestamp(refresh_job.finished_at):%H:%M:%S}")
+    for err in refresh_job.errors[-3:]:
+        st.sidebar.caption(f"⚠️ {err}")
 st.sidebar.markdown("---")
 st.sidebar.caption("Auto-refresh every 60s")
 
 # ---- Data Preparation ----
-filtered_videos = working_videos.copy()
+trace.lap("section.data_preparation")
+# videos_df is sorted by date_col, so the date filter is a positional slice (a view)
+filtered_videos = videos_df
 
 # Apply date filter
 if start_date and end_date and date_col in filtered_videos.columns:
-    start_ts = pd.to_datetime(start_date)
-    end_ts = pd.to_datetime(end_date) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-    mask = (filtered_videos[date_col] >= start_ts) & (filtered_videos[date_col] <= end_ts)
-    filtered_videos = filtered_videos[mask].copy()
-for col in ["views", "likes", "dislikes", "comments"]:
-    if col not in filtered_videos.columns:
-        filtered_videos[col] = 0
-    filtered_videos[col] = pd.to_numeric(filtered_videos[col], errors="coerce").fillna(0)
-filtered_videos["engagement_rate"] = (
-    (filtered_videos["likes"] + filtered_videos["comments"]) /
-    filtered_videos["views"].replace({0: pd.NA})
-).fillna(0)
-df_top_n = filtered_videos.nlargest(top_n, "views").copy()
+    filtered_videos = queries.filter_by_date(filtered_videos, date_col, start_date, end_date)
+
+# Apply topic filters (index lookups; only the matching ids come back)
+topic_ids = search_videos(data_version(), search_text.strip(), tuple(selected_tags))
+if topic_ids is not None:
+    filtered_videos = filtered_videos[filtered_videos["video_id"].isin(topic_ids)]
+df_top_n = filtered_videos.nlargest(top_n, "views")
 
 # ---- Premium Metric Card ----
 def metric_card(title, value, icon, submetric=None):
@@ -342,6 +571,7 @@ def metric_card(title, value, icon, submetric=None):
     """, unsafe_allow_html=True)
 
 # ---- KPI Row 1: Channel Overview ----
+trace.lap("section.kpi_cards")
 st.markdown("#### 📌 Channel Overview")
 cols_kpi = st.columns(4)
 kpi_map = [
@@ -394,42 +624,29 @@ for label, key, icon, sm in top_metrics:
 st.markdown("---")
 
 # ---- Subscriber Growth Charts (with contrast fixes) ----
-def fixed_chart_layout(fig):
-    fig.update_layout(
-        font_color=AXIS_FONT_COLOR,
-        plot_bgcolor=PLOTLY_BG,
-        paper_bgcolor=PLOTLY_BG,
-        xaxis=dict(color=AXIS_FONT_COLOR, showgrid=False, zeroline=False, tickfont=dict(color=AXIS_FONT_COLOR)),
-        yaxis=dict(color=AXIS_FONT_COLOR, showgrid=False, zeroline=False, tickfont=dict(color=AXIS_FONT_COLOR)),
-        title_font=dict(color=AXIS_FONT_COLOR),
-        legend=dict(font=dict(color=AXIS_FONT_COLOR)),
-        coloraxis_colorbar=dict(tickfont=dict(color=AXIS_FONT_COLOR), title_font=dict(color=AXIS_FONT_COLOR))
-    )
-    return fig
-
+trace.lap("section.subscriber_growth")
 st.subheader("📈 Subscriber Growth")
-if not working_channel_history.empty:
-    ch = working_channel_history.copy()
-    ch["fetched_at"] = pd.to_datetime(ch["fetched_at"], errors='coerce')
+if not channel_history_df.empty:
+    ch = channel_history_df
     fig_daily = px.line(ch, x="fetched_at", y="subscribers", markers=True,
         title="Subscribers Over Time", template=PLOTLY_THEME, color_discrete_sequence=["#2ba8ea"])
-    st.plotly_chart(fixed_chart_layout(fig_daily), use_container_width=True)
-    ch["month"] = ch["fetched_at"].dt.to_period("M")
-    monthly_subs = ch.groupby("month")["subscribers"].last().reset_index()
-    monthly_subs["month"] = monthly_subs["month"].dt.to_timestamp()
-    fig_monthly = px.line(monthly_subs, x="month", y="subscribers", markers=True,
-        title="Monthly Subscriber Growth", template=PLOTLY_THEME, color_discrete_sequence=["#3939c9","#2ba8ea","#e040fb"])
-    st.plotly_chart(fixed_chart_layout(fig_monthly), use_container_width=True)
+    show_chart("daily", fig_daily)
+    monthly_subs = load_monthly_rollup(data_version(), selected_channel)
+    if not monthly_subs.empty:
+        fig_monthly = px.line(monthly_subs, x="month", y="subscribers", markers=True,
+            title="Monthly Subscriber Growth", template=PLOTLY_THEME, color_discrete_sequence=["#3939c9","#2ba8ea","#e040fb"])
+        show_chart("monthly", fig_monthly)
 else:
     st.info("No channel history data available.")
 
 # ---- Video Insights / Charts (with contrast fixes) ----
+trace.lap("section.top_videos")
 st.subheader("🔥 Top Videos & Engagement")
 if not df_top_n.empty:
     fig_top = px.bar(df_top_n, x="title", y="views", text="views", title=f"Top {top_n} Videos by Views",
                      template=PLOTLY_THEME, color="views", color_continuous_scale=px.colors.sequential.Agsunset)
     fig_top.update_traces(texttemplate='%{text:.2s}', textposition='outside')
-    st.plotly_chart(fixed_chart_layout(fig_top), use_container_width=True)
+    show_chart("top", fig_top)
 else:
     st.info("No video rows to show in Top N chart.")
 
@@ -439,7 +656,7 @@ if not top_eng.empty:
     fig_eng = px.bar(top_eng, x="title", y="engagement_rate", text=top_eng["engagement_rate"].map(lambda x: f"{x:.2%}"),
         title=f"Top {min(top_n, len(top_eng))} Videos by Engagement Rate", template=PLOTLY_THEME,
         color="engagement_rate", color_continuous_scale=px.colors.sequential.Magenta)
-    st.plotly_chart(fixed_chart_layout(fig_eng), use_container_width=True)
+    show_chart("eng", fig_eng)
 else:
     st.info("No videos to show in engagement chart.")
 
@@ -448,7 +665,7 @@ if not filtered_videos.empty:
     fig_scatter = px.scatter(filtered_videos, x="views", y="engagement_rate", size="likes",
         hover_name="title", title="Engagement Rate vs Views", template=PLOTLY_THEME,
         color="likes", color_continuous_scale=px.colors.sequential.PuBuGn)
-    st.plotly_chart(fixed_chart_layout(fig_scatter), use_container_width=True)
+    show_chart("scatter", fig_scatter)
 else:
     st.info("No data for scatter chart.")
 
@@ -456,67 +673,105 @@ st.subheader("Likes Distribution (Top 10)")
 top_likes = filtered_videos.nlargest(10, "likes")
 if not top_likes.empty:
     fig_likes = px.pie(top_likes, names="title", values="likes", title="Top 10 Videos by Likes", template=PLOTLY_THEME)
-    st.plotly_chart(fixed_chart_layout(fig_likes), use_container_width=True)
+    show_chart("likes", fig_likes)
 if filtered_videos["dislikes"].sum() > 0:
     st.subheader("Dislikes Distribution (Top 10)")
     top_dislikes = filtered_videos.nlargest(10, "dislikes")
     fig_dislikes = px.pie(top_dislikes, names="title", values="dislikes", title="Top 10 Videos by Dislikes", template=PLOTLY_THEME)
-    st.plotly_chart(fixed_chart_layout(fig_dislikes), use_container_width=True)
+    show_chart("dislikes", fig_dislikes)
+
+# ---- Hashtag Performance ----
+trace.lap("section.hashtags")
+st.subheader("#️⃣ Hashtag Performance")
+if not hashtag_stats_df.empty:
+    top_tags = hashtag_stats_df.nlargest(15, "total_views")
+    fig_tags = px.bar(top_tags, x="tag", y="median_views", text="video_count",
+                      title="Median Views by Hashtag (label = videos)", template=PLOTLY_THEME,
+                      color="engagement_rate", color_continuous_scale=px.colors.sequential.Magenta)
+    show_chart("tags", fig_tags)
+    show_table("hashtags", top_tags[["tag", "video_count", "total_views", "median_views", "engagement_rate"]].reset_index(drop=True))
+else:
+    st.info("No hashtags found in your titles yet.")
+
+# ---- Best Time to Publish ----
+trace.lap("section.publish_heatmap")
+st.subheader("🗓️ Best Time to Publish")
+heatmap_df = load_publish_heatmap(snapshot_version(), selected_channel)
+if not heatmap_df.empty:
+    HEATMAP_METRICS = {"Median Views": "median_views", "Mean Views": "mean_views",
+                       "Engagement Rate": "engagement_rate", "Videos Published": "videos"}
+    heat_label = st.radio("Color by", list(HEATMAP_METRICS), horizontal=True, key="heatmap_metric")
+    # strftime('%w') numbers Sunday as 0; show the week starting on Monday
+    weekday_names = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+    grid = (heatmap_df.pivot(index="weekday", columns="hour", values=HEATMAP_METRICS[heat_label])
+            .reindex(index=[1, 2, 3, 4, 5, 6, 0], columns=range(24)))
+    fig_heat = px.imshow(grid.to_numpy(dtype="float64", na_value=float("nan")), x=[f"{h:02d}:00" for h in range(24)],
+                         y=[weekday_names[d] for d in grid.index], aspect="auto",
+                         labels=dict(x="Hour (UTC)", y="Weekday", color=heat_label),
+                         title=f"{heat_label} by Publish Day & Hour", template=PLOTLY_THEME,
+                         color_continuous_scale=px.colors.sequential.Agsunset)
+    show_chart("heat", fig_heat)
+    best = heatmap_df.loc[heatmap_df["median_views"].idxmax()]
+    st.caption(f"🏆 Best slot so far: {weekday_names[int(best['weekday'])]} {int(best['hour']):02d}:00 UTC — "
+               f"median {best['median_views']:,.0f} views over {int(best['videos'])} videos")
+else:
+    st.info("No publish dates available yet.")
 
 # ---- Latest Video Table ----
+trace.lap("section.latest_table")
 st.subheader("Latest Video Stats (Filtered)")
 table_cols = ["title", "views", "likes", "dislikes", "comments", date_col] if date_col in filtered_videos.columns else ["title", "views", "likes", "dislikes", "comments"]
-st.dataframe(filtered_videos[table_cols].reset_index(drop=True), use_container_width=True)
+show_table("latest_videos", filtered_videos[table_cols].iloc[::-1].reset_index(drop=True))
 
 st.markdown("---")
 
 # ===============================================
 # 🧠 INSIGHTS & DECISION MAKING SECTION
 # ===============================================
+trace.lap("section.insights")
 st.header("🧠 Smart Insights & Recommendations")
 
-if not filtered_videos.empty:
+# The default (unfiltered) view reads the snapshot computed at ingest (see
+# youtube_insight_snapshots.py); a date or topic filter recomputes it live
+insight_channel = selected_channel
+if insight_channel is None and not channel_df.empty and "channel_id" in channel_df.columns:
+    insight_channel = channel_df["channel_id"].iloc[0]
+insight_channel = str(insight_channel) if pd.notna(insight_channel) else None
+filters_applied = (start_date, end_date) != (min_date, max_date) or topic_ids is not None
+
+insights = None
+if not filters_applied and insight_channel is not None:
+    insights = load_insight_snapshot(data_version(), insight_channel)
+if insights is None and not filtered_videos.empty:
+    # Scored on each video's latest snapshot, like the ingest-time snapshot
+    latest_videos = filtered_videos
+    if "video_id" in filtered_videos.columns:
+        latest_videos = filtered_videos.sort_values("fetched_at", kind="stable").drop_duplicates("video_id", keep="last")
+    channel_totals = ((channel_df["subscribers"].iloc[0], channel_df["total_views"].iloc[0], channel_df["total_videos"].iloc[0])
+                      if not channel_df.empty else ())
+    insights = channel_insights(latest_videos, *channel_totals)
+
+if insights is not None:
     
     # ---- Performance Score for Each Video ----
     st.subheader("📊 Video Performance Scores")
-    
-    scored_videos = filtered_videos.copy()
-    
-    # Calculate performance score (0-100)
-    max_views = scored_videos["views"].max() if scored_videos["views"].max() > 0 else 1
-    max_likes = scored_videos["likes"].max() if scored_videos["likes"].max() > 0 else 1
-    max_comments = scored_videos["comments"].max() if scored_videos["comments"].max() > 0 else 1
-    
-    scored_videos["view_score"] = (scored_videos["views"] / max_views) * 40
-    scored_videos["like_score"] = (scored_videos["likes"] / max_likes) * 35
-    scored_videos["comment_score"] = (scored_videos["comments"] / max_comments) * 25
-    scored_videos["performance_score"] = (
-        scored_videos["view_score"] + scored_videos["like_score"] + scored_videos["comment_score"]
-    ).round(1)
-    
-    # Performance grade
-    def get_grade(score):
-        if score >= 80: return "🏆 A+"
-        elif score >= 65: return "⭐ A"
-        elif score >= 50: return "👍 B"
-        elif score >= 35: return "📈 C"
-        else: return "💪 D"
-    
-    scored_videos["grade"] = scored_videos["performance_score"].apply(get_grade)
+    if "version" in insights:
+        st.caption(f"📸 Insight snapshot v{insights['version']}, computed at ingest ({insights['computed_at']} UTC). "
+                   "Set a date or topic filter to recompute.")
     
     # Show top performers
-    top_performers = scored_videos.nlargest(5, "performance_score")[["title", "views", "likes", "comments", "performance_score", "grade"]]
     st.markdown("**🏆 Top 5 Best Performing Videos**")
-    st.dataframe(top_performers.reset_index(drop=True), use_container_width=True)
+    show_table("top_performers", pd.DataFrame(insights["top_performers"], columns=PERFORMER_COLUMNS))
     
     # ---- Growth Velocity ----
     st.subheader("🚀 Growth Analysis")
     
     col1, col2, col3 = st.columns(3)
     
-    avg_views = filtered_videos["views"].mean()
-    avg_likes = filtered_videos["likes"].mean()
-    avg_engagement = filtered_videos["engagement_rate"].mean() * 100
+    summary = insights["summary"]
+    avg_views = summary["avg_views"]
+    avg_likes = summary["avg_likes"]
+    avg_engagement = summary["avg_engagement"]
     
     with col1:
         metric_card("Avg Views/Video", f"{avg_views:,.0f}", "👀", 
@@ -528,13 +783,25 @@ if not filtered_videos.empty:
         metric_card("Avg Engagement", f"{avg_engagement:.2f}%", "📈",
                    submetric=f"{'🟢 Excellent' if avg_engagement > 5 else '🟡 Normal'}" if avg_engagement > 2 else "🔴 Low")
     
+    # ---- Trending Now (views/hour between the two latest snapshots) ----
+    trending = load_trending(data_version(), selected_channel, top_n)
+    st.markdown("**🔥 Trending Now** — views per hour since the previous snapshot")
+    if not trending.empty:
+        fig_trend = px.bar(trending, x="title", y="views_velocity", title="Current Views per Hour",
+                           template=PLOTLY_THEME, color="views_velocity", color_continuous_scale=px.colors.sequential.Agsunset,
+                           hover_data=["views_per_hour", "delta_views", "delta_hours"])
+        show_chart("trend", fig_trend)
+        show_table("trending", trending.round(2))
+    else:
+        st.info("No velocity data yet. It appears after the next fetch.")
+    
     # ---- Content Strategy Insights ----
     st.subheader("💡 Content Strategy Insights")
     
     # Best performing content analysis
-    if len(scored_videos) >= 3:
-        best_video = scored_videos.loc[scored_videos["performance_score"].idxmax()]
-        worst_video = scored_videos.loc[scored_videos["performance_score"].idxmin()]
+    if insights["best"] is not None:
+        best_video = insights["best"]
+        worst_video = insights["worst"]
         
         insights_col1, insights_col2 = st.columns(2)
         
@@ -561,99 +828,33 @@ if not filtered_videos.empty:
     # ---- AI-Powered Recommendations ----
     st.subheader("🤖 Smart Recommendations")
     
-    recommendations = []
-    
-    # Engagement analysis
-    if avg_engagement < 2:
-        recommendations.append("📢 **Boost Engagement**: Your engagement rate is low. Try asking questions in your videos and encouraging comments!")
-    elif avg_engagement < 5:
-        recommendations.append("👍 **Good Engagement**: Your audience is responding. Keep interacting with comments to build community!")
-    else:
-        recommendations.append("🔥 **Amazing Engagement**: Your content resonates well! Consider going live to leverage this connection!")
-    
-    # View analysis
-    if avg_views < 50:
-        recommendations.append("🎯 **Increase Visibility**: Focus on SEO - use better titles, descriptions, and tags. Share on social media!")
-    elif avg_views < 200:
-        recommendations.append("📈 **Growing Views**: You're on track! Consider collaborations to reach new audiences.")
-    else:
-        recommendations.append("🚀 **Great Reach**: Your content is being discovered. Maintain consistent upload schedule!")
-    
-    # Like ratio analysis
-    like_view_ratio = (filtered_videos["likes"].sum() / max(filtered_videos["views"].sum(), 1)) * 100
-    if like_view_ratio < 2:
-        recommendations.append("💪 **Improve Like Ratio**: Only {:.1f}% of viewers like your videos. Add a call-to-action reminder!".format(like_view_ratio))
-    else:
-        recommendations.append("❤️ **Solid Like Ratio**: {:.1f}% like rate is healthy. Your content quality is good!".format(like_view_ratio))
-    
-    # Comment analysis
-    comment_ratio = (filtered_videos["comments"].sum() / max(filtered_videos["views"].sum(), 1)) * 100
-    if comment_ratio < 0.5:
-        recommendations.append("💬 **Encourage Discussion**: Ask thought-provoking questions to spark conversations!")
-    else:
-        recommendations.append("🗣️ **Active Community**: Your audience loves to engage. Reply to comments within 1 hour for maximum impact!")
-    
-    # Content consistency
-    if len(filtered_videos) >= 5:
-        recommendations.append("📅 **Consistency Tip**: Analyze your {0} videos and find patterns in your top performers.".format(len(filtered_videos)))
-    
-    for rec in recommendations:
+    for rec in insights["recommendations"]:
         st.markdown(f"- {rec}")
     
     # ---- Quick Action Items ----
     st.subheader("✅ Your Action Items")
     
-    action_items = []
-    
-    if avg_engagement < 3:
-        action_items.append("Add 'Like & Subscribe' reminder in your next video")
-    if like_view_ratio < 3:
-        action_items.append("Create a more compelling thumbnail for your next upload")
-    if comment_ratio < 1:
-        action_items.append("End your next video with a question to viewers")
-    if len(filtered_videos) < 10:
-        action_items.append("Upload more consistently - aim for 1-2 videos per week")
-    else:
-        action_items.append("Maintain your upload schedule - consistency builds audience")
-    
-    action_items.append("Analyze your best performer and replicate its style")
-    action_items.append("Share your next video on 3 social platforms within 24 hours")
-    
-    for i, item in enumerate(action_items[:5], 1):
+    for i, item in enumerate(insights["action_items"], 1):
         st.checkbox(f"{item}", key=f"action_{i}")
 
 else:
     st.info("Upload some videos to see insights!")
 
 # ---- Channel Health Score ----
+trace.lap("section.health")
 st.markdown("---")
 st.subheader("🏥 Channel Health Score")
 
-if not channel_df.empty and not filtered_videos.empty:
-    subs = int(channel_df['subscribers'].iloc[0])
-    total_views = int(channel_df['total_views'].iloc[0])
-    total_videos = int(channel_df['total_videos'].iloc[0])
-    
-    # Calculate health score
-    views_per_video = total_views / max(total_videos, 1)
-    views_per_sub = total_views / max(subs, 1)
-    
-    health_score = min(100, (
-        min(30, subs / 100 * 30) +  # Subscriber score (max 30)
-        min(40, views_per_video / 100 * 40) +  # Views per video (max 40)
-        min(30, avg_engagement * 6)  # Engagement score (max 30)
-    ))
-    
-    health_color = "#19be6c" if health_score >= 60 else "#f0a500" if health_score >= 40 else "#e04040"
+health = insights["health"] if insights is not None else None
+if health is not None:
+    health_color = "#19be6c" if health["health_score"] >= 60 else "#f0a500" if health["health_score"] >= 40 else "#e04040"
     
     st.markdown(f"""
     <div style='text-align:center;padding:20px;'>
-        <div style='font-size:80px;font-weight:bold;color:{health_color};'>{health_score:.0f}</div>
+        <div style='font-size:80px;font-weight:bold;color:{health_color};'>{health["health_score"]:.0f}</div>
         <div style='font-size:24px;color:{BANNER_FONT_COLOR};'>out of 100</div>
         <div style='font-size:16px;color:#888;margin-top:10px;'>
-            {'🌟 Excellent! Keep up the great work!' if health_score >= 70 else 
-             '📈 Good progress! Room to grow!' if health_score >= 50 else 
-             '💪 Building momentum! Stay consistent!'}
+            {health_message(health["health_score"])}
         </div>
     </div>
     """, unsafe_allow_html=True)
@@ -662,14 +863,45 @@ if not channel_df.empty and not filtered_videos.empty:
     st.markdown("**Score Breakdown:**")
     health_col1, health_col2, health_col3 = st.columns(3)
     with health_col1:
-        st.metric("Subscriber Score", f"{min(30, subs / 100 * 30):.0f}/30")
+        st.metric("Subscriber Score", f"{health['subscriber_score']:.0f}/30")
     with health_col2:
-        st.metric("Content Score", f"{min(40, views_per_video / 100 * 40):.0f}/40")
+        st.metric("Content Score", f"{health['content_score']:.0f}/40")
     with health_col3:
-        st.metric("Engagement Score", f"{min(30, avg_engagement * 6):.0f}/30")
+        st.metric("Engagement Score", f"{health['engagement_score']:.0f}/30")
+
+    # ---- Health History (one point per ingest-time insight snapshot) ----
+    health_history = load_health_history(data_version(), insight_channel) if insight_channel else pd.DataFrame()
+    if len(health_history) > 1:
+        fig_health = px.line(health_history, x="computed_at",
+                             y=["health_score", "subscriber_score", "content_score", "engagement_score"],
+                             markers=True, title="Health Score History", template=PLOTLY_THEME,
+                             labels={"computed_at": "Snapshot", "value": "Score", "variable": "Component"})
+        show_chart("health_history", fig_health)
+    else:
+        st.caption("📈 Health history appears once a few refreshes have been recorded.")
+
+# ---- Anomaly Alerts ----
+trace.lap("section.alerts")
+st.markdown("---")
+st.subheader("🚨 Anomaly Alerts")
+alerts_df = load_alerts(data_version(), selected_channel)
+if not alerts_df.empty:
+    ALERT_ICONS = {"spike": "📈 Spike", "drop": "📉 Drop", "trend_up": "🚀 Growth speeding up", "trend_down": "🐢 Growth slowing down"}
+    video_titles = dict(zip(videos_df["video_id"].astype(str), videos_df["title"].astype(str))) if "video_id" in videos_df.columns else {}
+    for alert in alerts_df.itertuples():
+        name = video_titles.get(alert.entity_id, alert.entity_id) if alert.entity_type == "video" else "Channel"
+        st.markdown(
+            f"- **{ALERT_ICONS.get(alert.kind, alert.kind)}** in {alert.metric.replace('_', ' ')} • {name} • "
+            f"{alert.observed:,.1f}/h vs {alert.expected:,.1f}/h expected (z = {alert.zscore:+.1f}) • {alert.snapshot_at}"
+        )
+else:
+    st.info("No anomalies detected so far. 🎉")
+
+render_debug_panel()
 
 # ---- Auto-refresh ----
-count = st_autorefresh(interval=60000, key="refresh")
+# Poll faster while a background refresh is running so its data shows up promptly
+count = st_autorefresh(interval=2000 if refresh_job is not None and refresh_job.running else 60000, key="refresh")
 
 # ---- Footer Branding ----
 st.markdown("---")
@@ -0,0 +1,287 @@
+"""
+Shared SQLite Store for YouTube Analytics Dashboard
+One place for the database path, engine and schema, so the fetcher, the
+demo-data generator and the dashboard always agree on every table.
+
+Importing this module is free of side effects: SQLAlchemy is only loaded and
+the engine only created on the first get_engine() call.
+"""
+
+import os
+import threading
+
+# SQLite connection (local file, no password needed!)
+# YOUTUBE_DB_PATH points everything at another file (benchmarks, scratch copies)
+DB_PATH = os.getenv("YOUTUBE_DB_PATH") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "youtube_data.db")
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Shared SQLAlchemy engine for DB_PATH, created on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from sqlalchemy import create_engine
+                _engine = create_engine(f"sqlite:///{DB_PATH}")
+    return _engine
+
+
+# ----------------- SCHEMA -----------------
+SCHEMA = [
+    # Raw snapshots, appended on every fetch
+    """
+    CREATE TABLE IF NOT EXISTS channel_stats (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel_id TEXT,
+        channel_name TEXT,
+        subscribers INTEGER,
+        total_views INTEGER,
+        total_videos INTEGER,
+        dislikes INTEGER DEFAULT 0,
+        fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS video_stats (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel_id TEXT,
+        video_id TEXT,
+        title TEXT,
+        published_at TIMESTAMP,
+        views INTEGER,
+        likes INTEGER,
+        dislikes INTEGER DEFAULT 0,
+        comments INTEGER,
+        fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # One row per channel, refreshed during ingest (see youtube_rollups.py)
+    """
+    CREATE TABLE IF NOT EXISTS channel_kpis (
+        channel_id TEXT PRIMARY KEY,
+        channel_name TEXT,
+        subscribers INTEGER,
+        total_views INTEGER,
+        total_videos INTEGER,
+        views_per_video REAL,
+        tracked_videos INTEGER,
+        engagement_rate REAL,
+        subs_growth_per_day REAL,
+        snapshots INTEGER,
+        first_fetched_at TIMESTAMP,
+        last_fetched_at TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # Latest snapshot per video plus velocity against the previous snapshot
+    """
+    CREATE TABLE IF NOT EXISTS video_latest (
+        video_id TEXT PRIMARY KEY,
+        channel_id TEXT,
+        title TEXT,
+        published_at TIMESTAMP,
+        fetched_at TIMESTAMP,
+        snapshot_id INTEGER,
+        views INTEGER,
+        likes INTEGER,
+        dislikes INTEGER,
+        comments INTEGER,
+        views_per_hour REAL,
+        likes_per_hour REAL,
+        comments_per_hour REAL,
+        delta_views INTEGER,
+        delta_likes INTEGER,
+        delta_comments INTEGER,
+        delta_hours REAL,
+        views_velocity REAL
+    )
+    """,
+    # Online detector state, one row per (entity, counter); see youtube_alerts.py
+    """
+    CREATE TABLE IF NOT EXISTS detector_state (
+        entity_type TEXT,
+        entity_id TEXT,
+        metric TEXT,
+        last_value REAL,
+        last_at TIMESTAMP,
+        level REAL,
+        trend REAL,
+        var REAL,
+        cusum_pos REAL,
+        cusum_neg REAL,
+        n INTEGER,
+        PRIMARY KEY (entity_type, entity_id, metric)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS alerts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        entity_type TEXT,
+        entity_id TEXT,
+        channel_id TEXT,
+        metric TEXT,
+        kind TEXT,
+        observed REAL,
+        expected REAL,
+        zscore REAL,
+        snapshot_at TIMESTAMP,
+        detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # Title search: FTS5 external-content index over video_titles (kept in sync by triggers)
+    """
+    CREATE TABLE IF NOT EXISTS video_titles (
+        id INTEGER PRIMARY KEY,
+        video_id TEXT UNIQUE,
+        title TEXT
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS video_titles_fts USING fts5(
+        title, content='video_titles', content_rowid='id', tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS video_titles_ai AFTER INSERT ON video_titles BEGIN
+        INSERT INTO video_titles_fts (rowid, title) VALUES (new.id, new.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS video_titles_ad AFTER DELETE ON video_titles BEGIN
+        INSERT INTO video_titles_fts (video_titles_fts, rowid, title) VALUES ('delete', old.id, old.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS video_titles_au AFTER UPDATE ON video_titles BEGIN
+        INSERT INTO video_titles_fts (video_titles_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        INSERT INTO video_titles_fts (rowid, title) VALUES (new.id, new.title);
+    END
+    """,
+    # Hashtags pulled out of titles at ingest, and their aggregates over video_latest
+    """
+    CREATE TABLE IF NOT EXISTS video_hashtags (
+        tag TEXT,
+        video_id TEXT,
+        PRIMARY KEY (tag, video_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS hashtag_stats (
+        tag TEXT PRIMARY KEY,
+        video_count INTEGER,
+        total_views INTEGER,
+        median_views REAL,
+        engagement_rate REAL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # Insight and health results per channel, appended at ingest whenever the
+    # channel's data changed (see youtube_insight_snapshots.py); kept as history
+    """
+    CREATE TABLE IF NOT EXISTS insight_snapshots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel_id TEXT,
+        version INTEGER,
+        rules_version INTEGER,
+        source_id INTEGER,
+        kpis_fetched_at TIMESTAMP,
+        video_count INTEGER,
+        avg_engagement REAL,
+        health_score REAL,
+        subscriber_score REAL,
+        content_score REAL,
+        engagement_score REAL,
+        payload TEXT,
+        computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (channel_id, version)
+    )
+    """,
+    # High-water marks for incremental rollups (last raw row id folded in)
+    """
+    CREATE TABLE IF NOT EXISTS rollup_state (
+        name TEXT PRIMARY KEY,
+        last_id INTEGER DEFAULT 0
+    )
+    """,
+    # Top-level comment threads, one row per thread (see youtube_comments.py)
+    """
+    CREATE TABLE IF NOT EXISTS comments (
+        thread_id TEXT PRIMARY KEY,
+        video_id TEXT,
+        channel_id TEXT,
+        author TEXT,
+        text TEXT,
+        like_count INTEGER,
+        reply_count INTEGER,
+        published_at TIMESTAMP,
+        updated_at TIMESTAMP,
+        fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # Where each video's comment walk stands, so an interrupted run resumes mid-video
+    """
+    CREATE TABLE IF NOT EXISTS comment_progress (
+        video_id TEXT PRIMARY KEY,
+        next_page_token TEXT,
+        pages INTEGER DEFAULT 0,
+        threads INTEGER DEFAULT 0,
+        completed_at TIMESTAMP,
+        status TEXT,
+        refresh INTEGER DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+]
+
+# Columns added after the first release; older databases get them via ALTER TABLE
+MIGRATIONS = [
+    ("channel_stats", "channel_id", "TEXT"),
+    ("video_stats", "channel_id", "TEXT"),
+    ("comment_progress", "refresh", "INTEGER DEFAULT 0"),
+]
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_channel_stats_channel ON channel_stats (channel_id, fetched_at)",
+    "CREATE INDEX IF NOT EXISTS idx_video_stats_channel ON video_stats (channel_id, video_id, fetched_at)",
+    "CREATE INDEX IF NOT EXISTS idx_video_stats_video ON video_stats (video_id, fetched_at)",
+    "CREATE INDEX IF NOT EXISTS idx_channel_kpis_subscribers ON channel_kpis (subscribers DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_video_latest_velocity ON video_latest (views_velocity DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_video_latest_channel ON video_latest (channel_id, views_velocity DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_alerts_channel ON alerts (channel_id, snapshot_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_video_latest_snapshot ON video_latest (snapshot_id)",
+    "CREATE INDEX IF NOT EXISTS idx_video_hashtags_video ON video_hashtags (video_id)",
+    "CREATE INDEX IF NOT EXISTS idx_hashtag_stats_videos ON hashtag_stats (video_count DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_comments_video ON comments (video_id, published_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_insight_snapshots_channel ON insight_snapshots (channel_id, rules_version, id DESC)",
+]
+
+
+def _ensure_column(conn, table, column, decl):
+    """Add a column to an existing table if it is missing"""
+    from sqlalchemy import text
+    existing = [row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))]
+    if column not in existing:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {decl}"))
+
+
+def init_database():
+    """Create tables and indexes if they don't exist
+
+    Also switches the database to write-ahead logging (WAL), so the dashboard
+    keeps reading while a fetch, the ingest writer process or the demo loader
+    commits. The mode is stored in the file and SQLite keeps -wal/-shm files
+    next to it while it is open.
+    """
+    from sqlalchemy import text
+    with get_engine().connect() as conn:
+        conn.execute(text("PRAGMA journal_mode = WAL"))
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+        for table, column, decl in MIGRATIONS:
+            _ensure_column(conn, table, column, decl)
+        for statement in INDEXES:
+            conn.execute(text(statement))
+        conn.commit()
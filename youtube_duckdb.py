@@ -0,0 +1,150 @@
+"""
+DuckDB Query Backend for YouTube Analytics Dashboard
+Optional analytical engine for the heavy aggregations (monthly rollups, the
+publish-time heatmap). DuckDB attaches the SQLite file read-only and runs the
+queries on its vectorized, multi-threaded executor; results come back as
+Arrow-backed DataFrames without a row-by-row conversion. SQLite stays the
+default; switch with
+
+    YOUTUBE_QUERY_BACKEND=duckdb streamlit run youtube_dashboard.py
+
+Tables can also be served from a Parquet archive (one <table>.parquet per
+table, columnar and compressed), which is where DuckDB is fastest. Write or
+refresh the archive with
+
+    python youtube_duckdb.py --archive archive/
+    YOUTUBE_PARQUET_DIR=archive/ YOUTUBE_QUERY_BACKEND=duckdb streamlit run youtube_dashboard.py
+
+Archived tables are a snapshot: re-run --archive after ingesting to pick up
+new data. Tables without an archive file are read live from SQLite.
+"""
+
+import argparse
+import glob
+import os
+import threading
+import time
+from youtube_db import DB_PATH
+
+PARQUET_DIR = os.getenv("YOUTUBE_PARQUET_DIR") or None
+# Tables the DuckDB queries read, each exposed as a view over SQLite or Parquet
+TABLES = ["channel_stats", "video_stats", "video_latest"]
+
+_lock = threading.Lock()
+_connection = None
+
+
+def available():
+    """True when the duckdb package is installed"""
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _load_sqlite_extension(con):
+    """Load DuckDB's sqlite extension, preferring the offline pip wheel when installed"""
+    import duckdb
+    try:
+        import duckdb_extension_sqlite_scanner as wheel
+    except ImportError:
+        wheel = None
+    if wheel is not None:
+        root = os.path.join(os.path.dirname(wheel.__file__), "extensions")
+        paths = (glob.glob(os.path.join(root, f"v{duckdb.__version__}", "*.duckdb_extension"))
+                 or glob.glob(os.path.join(root, "*", "*.duckdb_extension")))
+        if paths:
+            con.load_extension(paths[0])
+            return
+    con.install_extension("sqlite")   # downloads once into ~/.duckdb/extensions
+    con.load_extension("sqlite")
+
+
+def _literal(value):
+    """SQL string literal (ATTACH and COPY take no bound parameters)"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _parquet_path(table, parquet_dir):
+    path = os.path.join(parquet_dir, f"{table}.parquet") if parquet_dir else None
+    return path if path and os.path.exists(path) else None
+
+
+def connect(db_path=DB_PATH, parquet_dir=PARQUET_DIR):
+    """New in-memory DuckDB connection with the SQLite file attached read-only as `yt`
+
+    Every table in TABLES is a view in the default schema, over the Parquet
+    archive when it has a file there and over SQLite otherwise, so queries use
+    plain table names either way.
+    """
+    import duckdb
+    con = duckdb.connect()
+    _load_sqlite_extension(con)
+    con.execute(f"ATTACH {_literal(db_path)} AS yt (TYPE sqlite, READ_ONLY)")
+    for table in TABLES:
+        path = _parquet_path(table, parquet_dir)
+        source = f"read_parquet({_literal(path)})" if path else f"yt.{table}"
+        con.execute(f"CREATE VIEW {table} AS SELECT * FROM {source}")
+    return con
+
+
+def get_connection():
+    """Process-wide DuckDB connection, created on first use"""
+    global _connection
+    if _connection is None:
+        with _lock:
+            if _connection is None:
+                _connection = connect()
+    return _connection
+
+
+def query(sql, params=None):
+    """Run sql ($name placeholders) and return an Arrow-backed DataFrame"""
+    import pandas as pd
+    # DuckDB connections are not thread-safe; a cursor is a cheap per-call handle
+    # onto the same database, so concurrent dashboard sessions do not share one
+    with get_connection().cursor() as cur:
+        result = cur.execute(sql, params or {}).arrow()
+        table = result.read_all() if hasattr(result, "read_all") else result
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def write_archive(out_dir, tables=TABLES, db_path=DB_PATH):
+    """Copy tables from SQLite into out_dir/<table>.parquet; returns {table: bytes}"""
+    os.makedirs(out_dir, exist_ok=True)
+    con = connect(db_path, parquet_dir=None)
+    sizes = {}
+    try:
+        for table in tables:
+            path = os.path.join(out_dir, f"{table}.parquet")
+            tmp = path + ".tmp"
+            # Sorted by channel and time so per-channel filters skip whole row groups
+            con.execute(f"COPY (SELECT * FROM yt.{table} ORDER BY channel_id, fetched_at) "
+                        f"TO {_literal(tmp)} (FORMAT parquet, COMPRESSION zstd)")
+            os.replace(tmp, path)   # readers never see a half-written file
+            sizes[table] = os.path.getsize(path)
+    finally:
+        con.close()
+    return sizes
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="DuckDB query backend utilities")
+    parser.add_argument("--archive", metavar="DIR", required=True, help="write a Parquet archive of the history tables to DIR")
+    parser.add_argument("--tables", default=",".join(TABLES), help=f"comma-separated tables (default: {','.join(TABLES)})")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not available():
+        raise SystemExit("❌ duckdb is not installed (pip install duckdb)")
+    tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+    unknown = sorted(set(tables) - set(TABLES))
+    if unknown:
+        raise SystemExit(f"❌ Unknown table(s): {', '.join(unknown)}")
+    started = time.time()
+    for table, size in write_archive(args.archive, tables).items():
+        print(f"📦 {table}.parquet: {size / 1e6:,.1f} MB")
+    print(f"✅ Archive written to {args.archive}/ in {time.time() - started:.1f}s")
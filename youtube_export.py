@@ -0,0 +1,144 @@
+"""
+Streaming CSV Export for YouTube Analytics Dashboard
+Streams snapshot history out of SQLite in fixed-size chunks (a streaming
+cursor, never a DataFrame), optionally gzip-compressed on the fly, so even
+multi-gigabyte exports run in constant memory:
+
+    python youtube_export.py --out video_stats.csv.gz
+    python youtube_export.py --table channel_stats --channel UC123 --start 2024-01-01 --end 2024-03-31
+    python youtube_export.py --columns video_id,views,fetched_at --out - | head
+"""
+
+import argparse
+import csv
+import io
+import sys
+import zlib
+from datetime import date, timedelta
+from youtube_db import get_engine
+
+# Exportable tables and their columns (also the whitelist for --columns)
+EXPORT_TABLES = {
+    "video_stats": ["id", "channel_id", "video_id", "title", "published_at", "views", "likes",
+                    "dislikes", "comments", "fetched_at"],
+    "channel_stats": ["id", "channel_id", "channel_name", "subscribers", "total_views", "total_videos",
+                      "dislikes", "fetched_at"],
+}
+CHUNK_ROWS = 50_000
+
+
+def _build_query(table, channel_id=None, start_date=None, end_date=None, columns=None):
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table {table!r}; expected one of {', '.join(EXPORT_TABLES)}")
+    columns = list(columns or EXPORT_TABLES[table])
+    unknown = [c for c in columns if c not in EXPORT_TABLES[table]]
+    if unknown:
+        raise ValueError(f"Unknown column(s) for {table}: {', '.join(unknown)}")
+
+    where, params = [], {}
+    if channel_id:
+        where.append("channel_id = :channel_id")
+        params["channel_id"] = channel_id
+    # Timestamps are stored as ISO text, so date bounds compare as strings
+    if start_date:
+        where.append("fetched_at >= :start")
+        params["start"] = str(start_date)
+    if end_date:
+        where.append("fetched_at < :end")
+        params["end"] = str(date.fromisoformat(str(end_date)) + timedelta(days=1))
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    # Primary-key order streams straight off the table without a sort
+    return sql + " ORDER BY id", params, columns
+
+
+def iter_rows(table="video_stats", channel_id=None, start_date=None, end_date=None, columns=None,
+              chunk_rows=CHUNK_ROWS):
+    """Yield (columns, rows) chunks of at most chunk_rows rows from a streaming cursor"""
+    from sqlalchemy import text
+    sql, params, columns = _build_query(table, channel_id, start_date, end_date, columns)
+    with get_engine().connect() as conn:
+        result = conn.execution_options(stream_results=True, max_row_buffer=chunk_rows).execute(text(sql), params)
+        for rows in result.partitions(chunk_rows):
+            yield columns, rows
+
+
+def iter_csv(table="video_stats", channel_id=None, start_date=None, end_date=None, columns=None,
+             chunk_rows=CHUNK_ROWS, compress=False):
+    """Yield the export as encoded CSV byte chunks (gzip-compressed if compress)"""
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None   # wbits=31: gzip container
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    _, _, header = _build_query(table, channel_id, start_date, end_date, columns)
+
+    def flush():
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return gzip.compress(data) if gzip else data
+
+    writer.writerow(header)
+    for _, rows in iter_rows(table, channel_id, start_date, end_date, columns, chunk_rows):
+        writer.writerows(rows)
+        chunk = flush()
+        if chunk:
+            yield chunk
+    if buffer.tell():   # header only: no rows matched
+        yield flush()
+    if gzip:
+        yield gzip.flush()
+
+
+def export_csv(out, table="video_stats", channel_id=None, start_date=None, end_date=None, columns=None,
+               chunk_rows=CHUNK_ROWS, compress=None):
+    """Stream an export to a path ('-' for stdout); gzip defaults on for *.gz paths. Returns bytes written"""
+    if compress is None:
+        compress = str(out).endswith(".gz")
+    chunks = iter_csv(table, channel_id, start_date, end_date, columns, chunk_rows, compress)
+    written = 0
+    f = sys.stdout.buffer if out == "-" else open(out, "wb")
+    try:
+        for chunk in chunks:
+            f.write(chunk)
+            written += len(chunk)
+    finally:
+        if f is not sys.stdout.buffer:
+            f.close()
+        else:
+            f.flush()
+    return written
+
+
+def export_bytes(table="video_stats", channel_id=None, start_date=None, end_date=None, columns=None,
+                 compress=True):
+    """The whole export as one bytes object, built chunk by chunk (used for browser downloads)"""
+    out = io.BytesIO()
+    for chunk in iter_csv(table, channel_id, start_date, end_date, columns, compress=compress):
+        out.write(chunk)
+    return out.getvalue()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stream snapshot history from SQLite to CSV")
+    parser.add_argument("--table", choices=list(EXPORT_TABLES), default="video_stats", help="table to export (default: video_stats)")
+    parser.add_argument("--channel", help="only this channel id")
+    parser.add_argument("--start", help="first snapshot date, YYYY-MM-DD (inclusive)")
+    parser.add_argument("--end", help="last snapshot date, YYYY-MM-DD (inclusive)")
+    parser.add_argument("--columns", help="comma-separated columns (default: all)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help=f"rows per chunk (default: {CHUNK_ROWS:,})")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output (implied by a .gz file name)")
+    parser.add_argument("--out", default="-", help="output file, or - for stdout (default)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    columns = [c.strip() for c in args.columns.split(",") if c.strip()] if args.columns else None
+    try:
+        written = export_csv(args.out, args.table, args.channel, args.start, args.end, columns,
+                             args.chunk_rows, True if args.gzip else None)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    if args.out != "-":
+        print(f"✅ Exported {args.table} to {args.out} ({written / 1e6:,.1f} MB)", file=sys.stderr)
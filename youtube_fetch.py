@@ -1,9 +1,24 @@
-from googleapiclient.discovery import build
-import pandas as pd
-from sqlalchemy import create_engine, text
+"""
+YouTube Fetch Library for YouTube Analytics Dashboard
+Channel / video stats from the YouTube Data API into SQLite. The CLI scripts
+(youtube_fetch.py, youtube_analytics.py, youtubeanalysis.py) are thin
+wrappers around these functions.
+
+Importing this module does no I/O beyond reading .env: googleapiclient,
+pandas and SQLAlchemy are only loaded once a fetch actually runs, so it is
+cheap to import from the dashboard, report workers or tests.
+"""
+
 from datetime import datetime
+import argparse
+import json
 import os
+import time
 from dotenv import load_dotenv
+from youtube_db import DB_PATH, get_engine, init_database
+import youtube_trace as trace
+from youtube_metrics import (SWEEP_SECONDS, SWEEPS, API_CALLS, API_ERRORS, QUOTA_UNITS, ROWS_WRITTEN,
+                             ROWS_SKIPPED, DB_COMMIT_SECONDS, CHANNEL_LAST_SUCCESS, start_metrics_server)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -11,47 +26,151 @@ load_dotenv()
 # ----------------- CONFIG -----------------
 API_KEY = os.getenv("YOUTUBE_API_KEY", "")
 CHANNEL_ID = os.getenv("YOUTUBE_CHANNEL_ID", "")
+# Several channels can be tracked with a comma-separated YOUTUBE_CHANNEL_ID
+CHANNEL_IDS = [c.strip() for c in CHANNEL_ID.split(",") if c.strip()]
+NO_CHANNELS = "No channels to fetch: set YOUTUBE_CHANNEL_ID (comma-separated for several)"
+# Optional API base URL override, e.g. a local fake server for benchmarks
+API_ENDPOINT = os.getenv("YOUTUBE_API_ENDPOINT", "")
 
-# SQLite connection (local file, no password needed!)
-DB_PATH = os.path.join(os.path.dirname(__file__), "youtube_data.db")
-engine = create_engine(f"sqlite:///{DB_PATH}")
-
-# ----------------- INITIALIZE TABLES -----------------
-def init_database():
-    """Create tables if they don't exist"""
-    with engine.connect() as conn:
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS channel_stats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                channel_name TEXT,
-                subscribers INTEGER,
-                total_views INTEGER,
-                total_videos INTEGER,
-                dislikes INTEGER DEFAULT 0,
-                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS video_stats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                video_id TEXT,
-                title TEXT,
-                published_at TIMESTAMP,
-                views INTEGER,
-                likes INTEGER,
-                dislikes INTEGER DEFAULT 0,
-                comments INTEGER,
-                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        conn.commit()
-    print("✅ Database tables initialized")
+# Quota units per API method (https://developers.google.com/youtube/v3/determine_quota_cost)
+QUOTA_COST = {"channels.list": 1, "search.list": 100, "videos.list": 1, "commentThreads.list": 1}
+
+# SQLite store and schema are shared with the dashboard (see youtube_db.py)
+
+def build_client(api_key=None):
+    """YouTube Data API client; googleapiclient is imported here, on first use"""
+    from googleapiclient.discovery import build
+    client_options = {"api_endpoint": API_ENDPOINT} if API_ENDPOINT else None
+    return build("youtube", "v3", developerKey=api_key or API_KEY, client_options=client_options)
+
+
+def execute(request, method):
+    """Run one API request, counting it (and its quota) in the metrics and tracing its payload size"""
+    API_CALLS.inc(method=method)
+    # Failed requests are still charged against the quota
+    QUOTA_UNITS.inc(QUOTA_COST.get(method, 0), method=method)
+    with trace.span(f"api.{method}", quota=QUOTA_COST.get(method, 0)) as span:
+        try:
+            response = request.execute()
+        except Exception:
+            API_ERRORS.inc(method=method)
+            raise
+        if span:
+            span.set(rows=len(response.get("items", [])), bytes=len(json.dumps(response)))
+        return response
+
+
+def fetch_channel(youtube, channel_id, max_videos=10):
+    """Fetch one channel's stats and latest videos; returns (channel_stats, videos) or None"""
+
+    # ----------------- STEP 1: Channel Stats -----------------
+    channel_request = youtube.channels().list(
+        part="snippet,statistics",
+        id=channel_id
+    )
+    channel_response = execute(channel_request, "channels.list")
+
+    if not channel_response.get("items"):
+        print(f"❌ Channel ID {channel_id} not found.")
+        ROWS_SKIPPED.inc(reason="channel_not_found")
+        return None
+
+    channel_data = channel_response["items"][0]
+
+    channel_stats = {
+        "channel_id": channel_id,
+        "channel_name": channel_data["snippet"]["title"],
+        "subscribers": int(channel_data["statistics"]["subscriberCount"]),
+        "total_views": int(channel_data["statistics"]["viewCount"]),
+        "total_videos": int(channel_data["statistics"]["videoCount"]),
+        "dislikes": int(channel_data["statistics"].get("dislikeCount", 0))
+    }
+
+    # ----------------- STEP 2: Latest Videos -----------------
+    video_request = youtube.search().list(
+        part="snippet",
+        channelId=channel_id,
+        maxResults=max_videos,
+        order="date"
+    )
+    video_response = execute(video_request, "search.list")
+
+    videos = []
+
+    for item in video_response["items"]:
+        # Skip non-video items (like playlists)
+        if item["id"].get("kind") != "youtube#video" and "videoId" not in item["id"]:
+            ROWS_SKIPPED.inc(reason="not_a_video")
+            continue
+        
+        video_id = item["id"]["videoId"]
+        title = item["snippet"]["title"]
+        published_at = item["snippet"]["publishedAt"]
+
+        # Get video statistics
+        stats_request = youtube.videos().list(
+            part="statistics",
+            id=video_id
+        )
+        stats_response = execute(stats_request, "videos.list")
+        
+        if not stats_response["items"]:
+            ROWS_SKIPPED.inc(reason="no_statistics")
+            continue
+            
+        stats = stats_response["items"][0]["statistics"]
+
+        videos.append({
+            "channel_id": channel_id,
+            "video_id": video_id,
+            "title": title,
+            "published_at": datetime.fromisoformat(published_at.replace("Z", "+00:00")),
+            "views": int(stats.get("viewCount", 0)),
+            "likes": int(stats.get("likeCount", 0)),
+            "dislikes": int(stats.get("dislikeCount", 0)),
+            "comments": int(stats.get("commentCount", 0))
+        })
 
-def fetch_youtube_data():
-    """Fetch data from YouTube API and save to SQLite"""
+    return channel_stats, videos
+
+def save_channel(channel_stats, videos):
+    """Append one channel's snapshot rows to SQLite"""
+    import pandas as pd
+    engine = get_engine()
+
+    # Save channel stats to SQLite
+    df_channel = pd.DataFrame([channel_stats])
+    with trace.span("db.write.channel_stats", rows=1), DB_COMMIT_SECONDS.time(table="channel_stats"):
+        df_channel.to_sql("channel_stats", engine, if_exists="append", index=False)
+    ROWS_WRITTEN.inc(table="channel_stats")
+    print("✅ Channel stats inserted into SQLite")
+
+    # Save video stats to SQLite
+    if videos:
+        df_videos = pd.DataFrame(videos)
+        with trace.span("db.write.video_stats", rows=len(df_videos)), DB_COMMIT_SECONDS.time(table="video_stats"):
+            df_videos.to_sql("video_stats", engine, if_exists="append", index=False)
+        ROWS_WRITTEN.inc(len(df_videos), table="video_stats")
+        print(f"✅ {len(videos)} video stats inserted into SQLite")
+    else:
+        print("⚠️  No videos found to insert")
+
+def fetch_youtube_data(channel_ids=None, progress=None, workers=None):
+    """Fetch data from YouTube API and save to SQLite
+
+    progress, if given, is called after every channel with a dict of
+    channels_done, channels_total, videos_fetched and errors. With workers > 1
+    the sweep runs on a process pool with a single writer process (see
+    youtube_ingest.py).
+    """
+    if workers and workers > 1:
+        from youtube_ingest import ingest_parallel
+        return ingest_parallel(channel_ids, progress, workers)
+    channel_ids = channel_ids or CHANNEL_IDS
     
     # Initialize database
     init_database()
+    print("✅ Database tables initialized")
     
     # Check if API key is configured
     if not API_KEY:
@@ -60,92 +179,91 @@ def fetch_youtube_data():
         print("   Or run: python init_demo_data.py to use demo data instead")
         return False
 
+    fetched_channels = []
+    status = {"channels_done": 0, "channels_total": len(channel_ids), "videos_fetched": 0, "errors": []}
+    sweep_started = time.perf_counter()
+    if not channel_ids:
+        print(f"⚠️  {NO_CHANNELS}")
+        return sweep_failed(NO_CHANNELS, status, progress, sweep_started)
+
     try:
         # Build YouTube API client
-        youtube = build("youtube", "v3", developerKey=API_KEY)
+        youtube = build_client()
+    except Exception as e:
+        print(f"❌ Error fetching YouTube data: {e}")
+        return sweep_failed(str(e), status, progress, sweep_started)
 
-        # ----------------- STEP 1: Channel Stats -----------------
-        channel_request = youtube.channels().list(
-            part="snippet,statistics",
-            id=CHANNEL_ID
-        )
-        channel_response = channel_request.execute()
+    for channel_id in channel_ids:
+        try:
+            with trace.span("fetch.channel", channel_id=channel_id):
+                result = fetch_channel(youtube, channel_id)
+            if result is None:
+                status["errors"].append(f"Channel ID {channel_id} not found")
+            else:
+                channel_stats, videos = result
+                save_channel(channel_stats, videos)
+                status["videos_fetched"] += len(videos)
+                fetched_channels.append(channel_id)
+                CHANNEL_LAST_SUCCESS.set(time.time(), channel_id=channel_id)
 
-        if not channel_response["items"]:
-            print(f"❌ Channel ID {CHANNEL_ID} not found.")
-            return False
+        except Exception as e:
+            print(f"❌ Error fetching YouTube data: {e}")
+            status["errors"].append(f"{channel_id}: {e}")
 
-        channel_data = channel_response["items"][0]
+        status["channels_done"] += 1
+        if progress:
+            progress(status)
 
-        channel_stats = {
-            "channel_name": channel_data["snippet"]["title"],
-            "subscribers": int(channel_data["statistics"]["subscriberCount"]),
-            "total_views": int(channel_data["statistics"]["viewCount"]),
-            "total_videos": int(channel_data["statistics"]["videoCount"]),
-            "dislikes": int(channel_data["statistics"].get("dislikeCount", 0))
-        }
+    return finish_sweep(fetched_channels, status, sweep_started)
 
-        # Save channel stats to SQLite
-        df_channel = pd.DataFrame([channel_stats])
-        df_channel.to_sql("channel_stats", engine, if_exists="append", index=False)
-        print("✅ Channel stats inserted into SQLite")
-
-        # ----------------- STEP 2: Latest 10 Videos -----------------
-        video_request = youtube.search().list(
-            part="snippet",
-            channelId=CHANNEL_ID,
-            maxResults=10,
-            order="date"
-        )
-        video_response = video_request.execute()
+def sweep_failed(error, status, progress, sweep_started):
+    """Record a sweep that failed before fetching anything; always False"""
+    status["errors"].append(error)
+    if progress:
+        progress(status)
+    SWEEP_SECONDS.observe(time.perf_counter() - sweep_started)
+    SWEEPS.inc(status="failed")
+    return False
 
-        videos = []
+def finish_sweep(fetched_channels, status, sweep_started):
+    """Refresh the rollups for the channels written in a sweep and record its metrics; True if nothing failed"""
+    from youtube_rollups import refresh_rollups
 
-        for item in video_response["items"]:
-            # Skip non-video items (like playlists)
-            if item["id"].get("kind") != "youtube#video" and "videoId" not in item["id"]:
-                continue
-            
-            video_id = item["id"]["videoId"]
-            title = item["snippet"]["title"]
-            published_at = item["snippet"]["publishedAt"]
-
-            # Get video statistics
-            stats_request = youtube.videos().list(
-                part="statistics",
-                id=video_id
-            )
-            stats_response = stats_request.execute()
-            
-            if not stats_response["items"]:
-                continue
-                
-            stats = stats_response["items"][0]["statistics"]
-
-            videos.append({
-                "video_id": video_id,
-                "title": title,
-                "published_at": datetime.fromisoformat(published_at.replace("Z", "+00:00")),
-                "views": int(stats.get("viewCount", 0)),
-                "likes": int(stats.get("likeCount", 0)),
-                "dislikes": int(stats.get("dislikeCount", 0)),
-                "comments": int(stats.get("commentCount", 0))
-            })
-
-        # Save video stats to SQLite
-        if videos:
-            df_videos = pd.DataFrame(videos)
-            df_videos.to_sql("video_stats", engine, if_exists="append", index=False)
-            print(f"✅ {len(videos)} video stats inserted into SQLite")
-        else:
-            print("⚠️  No videos found to insert")
+    # Keep the per-channel aggregate tables in step with the new snapshots
+    if fetched_channels:
+        try:
+            with trace.span("db.refresh_rollups", channels=len(fetched_channels)), DB_COMMIT_SECONDS.time(table="rollups"):
+                refresh_rollups(fetched_channels)
+            print("✅ Channel rollups refreshed")
+        except Exception as e:
+            print(f"❌ Error refreshing rollups: {e}")
+            status["errors"].append(f"rollups: {e}")
 
-        print(f"\n📁 Data saved to: {DB_PATH}")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error fetching YouTube data: {e}")
-        return False
+    SWEEP_SECONDS.observe(time.perf_counter() - sweep_started)
+    SWEEPS.inc(status="failed" if status["errors"] else "succeeded")
+    print(f"\n📁 Data saved to: {DB_PATH}")
+    return not status["errors"]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch YouTube channel and video stats into SQLite")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("YOUTUBE_METRICS_PORT", 0) or 0),
+                        help="serve Prometheus metrics on this port (default: $YOUTUBE_METRICS_PORT, off)")
+    parser.add_argument("--metrics-addr", default=os.getenv("YOUTUBE_METRICS_ADDR") or "127.0.0.1",
+                        help="interface the metrics server binds to (default: $YOUTUBE_METRICS_ADDR, 127.0.0.1)")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="repeat the sweep every N seconds instead of running once")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("YOUTUBE_INGEST_WORKERS", 0) or 0),
+                        help="fetch on N worker processes with one writer process (default: $YOUTUBE_INGEST_WORKERS, sequential)")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    fetch_youtube_data()
+    args = parse_args()
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port, args.metrics_addr)
+        print(f"📊 Metrics at http://{args.metrics_addr}:{args.metrics_port}/metrics")
+    while True:
+        started = time.time()
+        fetch_youtube_data(workers=args.workers)
+        if not args.interval:
+            break
+        time.sleep(max(args.interval - (time.time() - started), 0))
@@ -0,0 +1,241 @@
+"""
+Parallel Ingestion for YouTube Analytics Dashboard
+For sweeps over thousands of channels: API calls, JSON parsing and row
+building run in a pool of fetch worker processes, and every finished row
+batch goes through a bounded queue to one writer process, the only process
+that writes to SQLite. A full queue blocks the fetch workers (backpressure)
+instead of letting rows pile up in memory.
+
+The writer groups batches into large transactions (TXN_ROWS rows, or
+whatever arrived within FLUSH_SECONDS), takes the write lock up front with
+BEGIN IMMEDIATE and waits out / retries lock contention from other
+connections (the dashboard, a comment ingest) instead of failing.
+
+    python youtube_fetch.py --workers 8
+    YOUTUBE_INGEST_WORKERS=8 python youtube_fetch.py --interval 900 --metrics-port 9108
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+from datetime import timezone
+import multiprocessing
+import os
+from queue import Empty, Full
+import sqlite3
+import time
+from youtube_db import DB_PATH, init_database
+from youtube_fetch import API_KEY, CHANNEL_IDS, NO_CHANNELS, build_client, fetch_channel, finish_sweep, sweep_failed
+import youtube_metrics as metrics
+from youtube_metrics import ROWS_WRITTEN, DB_COMMIT_SECONDS, CHANNEL_LAST_SUCCESS
+import youtube_trace as trace
+
+QUEUE_SIZE = 32          # row batches (one per channel) in flight to the writer
+TXN_ROWS = 20_000        # rows per write transaction
+FLUSH_SECONDS = 1.0      # commit a partial transaction after this long without a new batch
+BUSY_TIMEOUT = 30.0      # seconds SQLite waits on another connection's lock
+LOCK_RETRIES = 8         # further attempts (with backoff) once the busy timeout runs out
+
+CHANNEL_COLUMNS = ["channel_id", "channel_name", "subscribers", "total_views", "total_videos", "dislikes"]
+VIDEO_COLUMNS = ["channel_id", "video_id", "title", "published_at", "views", "likes", "dislikes", "comments"]
+
+
+def _insert_sql(table, columns):
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+
+def _video_row(video):
+    # Same text form pandas.to_sql writes in the sequential path (UTC, no offset)
+    published_at = video["published_at"].astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+    return tuple(published_at if col == "published_at" else video[col] for col in VIDEO_COLUMNS)
+
+
+# ---- Fetch workers ----
+
+_queue = None
+_writer_gone = None
+_youtube = None
+
+
+def _init_worker(queue, writer_gone):
+    global _queue, _writer_gone, _youtube
+    _queue, _writer_gone = queue, writer_gone
+    _youtube = build_client()
+
+
+def _put(batch):
+    """Hand a batch to the writer, blocking while the queue is full (backpressure)"""
+    while True:
+        try:
+            _queue.put(batch, timeout=5)
+            return
+        except Full:
+            if _writer_gone.is_set():
+                raise RuntimeError("writer process exited")
+
+
+def _fetch_task(channel_id, collect_spans):
+    """Fetch one channel and queue its rows; returns a summary plus this task's metrics and spans"""
+    result = {"channel_id": channel_id, "videos": 0, "error": None}
+    if _writer_gone.is_set():   # nowhere to send the rows, so spend no quota on them
+        return {**result, "error": f"{channel_id}: writer process exited", "metrics": {}, "spans": []}
+    with trace.collect() if collect_spans else nullcontext([]) as spans:
+        try:
+            with trace.span("fetch.channel", channel_id=channel_id):
+                fetched = fetch_channel(_youtube, channel_id)
+            if fetched is None:
+                result["error"] = f"Channel ID {channel_id} not found"
+            else:
+                channel_stats, videos = fetched
+                _put((channel_id, [tuple(channel_stats[c] for c in CHANNEL_COLUMNS)],
+                      [_video_row(v) for v in videos]))
+                result["videos"] = len(videos)
+        except Exception as e:
+            print(f"❌ Error fetching YouTube data: {e}")
+            result["error"] = f"{channel_id}: {e}"
+    return {**result, "metrics": metrics.drain(), "spans": spans}
+
+
+# ---- Writer process ----
+
+def _commit(conn, batches):
+    """Write batches in one transaction, retrying while another connection holds the lock"""
+    channel_rows = [row for _, rows, _ in batches for row in rows]
+    video_rows = [row for _, _, rows in batches for row in rows]
+    for attempt in range(LOCK_RETRIES + 1):
+        try:
+            with DB_COMMIT_SECONDS.time(table="ingest_batch"):
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(_insert_sql("channel_stats", CHANNEL_COLUMNS), channel_rows)
+                    conn.executemany(_insert_sql("video_stats", VIDEO_COLUMNS), video_rows)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            break
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) and "busy" not in str(e) or attempt == LOCK_RETRIES:
+                raise
+            time.sleep(min(0.25 * 2 ** attempt, 10))
+    ROWS_WRITTEN.inc(len(channel_rows), table="channel_stats")
+    ROWS_WRITTEN.inc(len(video_rows), table="video_stats")
+    return len(channel_rows) + len(video_rows)
+
+
+def _writer_main(queue, results, writer_gone, db_path, txn_rows, flush_seconds):
+    """Drain the queue into SQLite until the None sentinel; reports totals on results"""
+    try:
+        _drain(queue, results, db_path, txn_rows, flush_seconds)
+    finally:
+        writer_gone.set()   # workers blocked on a full queue give up instead of waiting forever
+
+
+def _drain(queue, results, db_path, txn_rows, flush_seconds):
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+    stats = {"channels": [], "rows": 0, "transactions": 0, "error": None}
+    pending, pending_rows, done = [], 0, False
+    while not done:
+        try:
+            batch = queue.get(timeout=flush_seconds)
+        except Empty:
+            batch = ()
+        if batch is None:
+            done = True
+        elif batch:
+            pending.append(batch)
+            pending_rows += len(batch[1]) + len(batch[2])
+        if pending and (done or not batch or pending_rows >= txn_rows):
+            # After a failure keep draining (and discarding) so the workers never block on a full queue
+            if stats["error"] is None:
+                try:
+                    stats["rows"] += _commit(conn, pending)
+                    stats["transactions"] += 1
+                    stats["channels"] += [channel_id for channel_id, _, _ in pending]
+                except Exception as e:
+                    stats["error"] = str(e)
+            pending, pending_rows = [], 0
+    conn.close()
+    results.put({**stats, "metrics": metrics.drain()})
+
+
+def _writer_result(writer, results):
+    while True:
+        try:
+            return results.get(timeout=1)
+        except Empty:
+            if not writer.is_alive():
+                return {"channels": [], "rows": 0, "transactions": 0, "metrics": {},
+                        "error": f"writer process exited with code {writer.exitcode}"}
+
+
+# ---- Sweep ----
+
+def ingest_parallel(channel_ids=None, progress=None, workers=None, queue_size=QUEUE_SIZE, txn_rows=TXN_ROWS):
+    """fetch_youtube_data() on a process pool with a single writer process; True if nothing failed"""
+    channel_ids = channel_ids or CHANNEL_IDS
+    init_database()
+    if not API_KEY:
+        print("⚠️  No YOUTUBE_API_KEY found in environment variables!")
+        return False
+
+    status = {"channels_done": 0, "channels_total": len(channel_ids), "videos_fetched": 0, "errors": []}
+    sweep_started = time.perf_counter()
+    if not channel_ids:
+        # Nothing to spawn a writer and a pool for
+        print(f"⚠️  {NO_CHANNELS}")
+        return sweep_failed(NO_CHANNELS, status, progress, sweep_started)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(channel_ids) or 1))
+    print(f"🚚 Fetching {len(channel_ids)} channel(s) on {workers} worker(s), one writer process...")
+
+    # Spawned, not forked: a forked writer inherits this process's SQLite lock
+    # bookkeeping and can wait forever on a lock some connection here held at fork time
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue(maxsize=queue_size)
+    results = ctx.Queue()
+    writer_gone = ctx.Event()
+    writer = ctx.Process(target=_writer_main, args=(queue, results, writer_gone, DB_PATH, txn_rows, FLUSH_SECONDS),
+                         name="youtube-writer", daemon=True)
+    writer.start()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(queue, writer_gone)) as pool:
+            pending = {pool.submit(_fetch_task, channel_id, trace.active()) for channel_id in channel_ids}
+            while pending:
+                done, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+                if not writer.is_alive():
+                    writer_gone.set()   # a killed writer never got to set it itself
+                for future in done:
+                    result = future.result()
+                    metrics.merge(result["metrics"])
+                    trace.replay(result["spans"])
+                    if result["error"]:
+                        status["errors"].append(result["error"])
+                    else:
+                        status["videos_fetched"] += result["videos"]
+                    status["channels_done"] += 1
+                    if progress:
+                        progress(status)
+    except BrokenProcessPool as e:
+        # e.g. build_client() failing in the worker initializer
+        print(f"❌ Fetch workers failed: {e}")
+        status["errors"].append(f"workers: {e}")
+    finally:
+        while writer.is_alive():
+            try:
+                queue.put(None, timeout=1)   # end of input: the writer flushes and exits
+                break
+            except Full:
+                pass
+        written = _writer_result(writer, results)
+        writer.join()
+
+    metrics.merge(written["metrics"])
+    if written["error"]:
+        print(f"❌ Error writing to SQLite: {written['error']}")
+        status["errors"].append(f"writer: {written['error']}")
+    for channel_id in written["channels"]:
+        CHANNEL_LAST_SUCCESS.set(time.time(), channel_id=channel_id)
+    print(f"✅ {written['rows']:,} rows from {len(written['channels'])} channel(s) written "
+          f"in {written['transactions']} transaction(s)")
+    return finish_sweep(written["channels"], status, sweep_started)
@@ -0,0 +1,98 @@
+"""
+Ingest-Time Insight Snapshots for YouTube Analytics Dashboard
+After each sweep, every channel whose data changed gets one new row in
+insight_snapshots: performance scores, best and worst performers, like and
+comment ratios, recommendations, action items and the health score, computed
+once from the video_latest and channel_kpis rollups. The dashboard's default
+(unfiltered) view reads the latest row instead of recomputing, and the rows
+double as a history of each channel's health score.
+
+Rows are versioned twice: `version` counts up per channel, and
+`rules_version` records which insight rules (youtube_insights.RULES_VERSION)
+produced them, so a rule change never serves stale recommendations.
+"""
+
+import json
+import pandas as pd
+from sqlalchemy import text, bindparam
+from youtube_insights import RULES_VERSION, channel_insights
+from youtube_queries import prepare_videos
+
+
+def _stale_channels(conn, channel_ids=None):
+    """channel_kpis rows of channels whose videos or totals moved past their latest snapshot"""
+    channel_filter = "channel_id IN :channel_ids" if channel_ids is not None else "channel_id IS NOT NULL"
+    stmt = text(f"""
+        WITH sources AS (
+            SELECT channel_id, MAX(snapshot_id) AS source_id
+            FROM video_latest
+            WHERE {channel_filter}
+            GROUP BY channel_id
+        ),
+        latest AS (
+            SELECT channel_id, source_id, kpis_fetched_at,
+                   ROW_NUMBER() OVER (PARTITION BY channel_id ORDER BY version DESC) AS rn
+            FROM insight_snapshots
+            WHERE rules_version = :rules_version AND {channel_filter}
+        )
+        SELECT k.channel_id, k.subscribers, k.total_views, k.total_videos, k.last_fetched_at, s.source_id
+        FROM channel_kpis k
+        JOIN sources s ON s.channel_id = k.channel_id
+        LEFT JOIN latest l ON l.channel_id = k.channel_id AND l.rn = 1
+        WHERE l.channel_id IS NULL OR s.source_id > l.source_id OR k.last_fetched_at > l.kpis_fetched_at
+    """)
+    params = {"rules_version": RULES_VERSION}
+    if channel_ids is not None:
+        stmt = stmt.bindparams(bindparam("channel_ids", expanding=True))
+        params["channel_ids"] = list(channel_ids)
+    return conn.execute(stmt, params).mappings().all()
+
+
+def refresh_insight_snapshots(conn, channel_ids=None):
+    """Append an insight snapshot for each changed channel in channel_ids (or all); returns the count"""
+    if channel_ids is not None and not channel_ids:
+        return 0
+    stale = _stale_channels(conn, channel_ids)
+    if not stale:
+        return 0
+
+    videos = pd.read_sql(text("""
+        SELECT channel_id, video_id, title, published_at, fetched_at, views, likes, dislikes, comments
+        FROM video_latest
+        WHERE channel_id IN :channel_ids
+    """).bindparams(bindparam("channel_ids", expanding=True)), conn,
+        params={"channel_ids": [row["channel_id"] for row in stale]})
+    videos = prepare_videos(videos)
+    by_channel = dict(tuple(videos.groupby("channel_id", observed=True)))
+
+    rows = []
+    for kpis in stale:
+        channel_videos = by_channel.get(kpis["channel_id"])
+        if channel_videos is None or channel_videos.empty:
+            continue
+        insights = channel_insights(channel_videos, kpis["subscribers"], kpis["total_views"], kpis["total_videos"])
+        health = insights["health"]
+        rows.append({
+            "channel_id": kpis["channel_id"],
+            "rules_version": RULES_VERSION,
+            "source_id": kpis["source_id"],
+            "kpis_fetched_at": kpis["last_fetched_at"],
+            "video_count": insights["summary"]["video_count"],
+            "avg_engagement": insights["summary"]["avg_engagement"],
+            "health_score": health["health_score"],
+            "subscriber_score": health["subscriber_score"],
+            "content_score": health["content_score"],
+            "engagement_score": health["engagement_score"],
+            "payload": json.dumps(insights, ensure_ascii=False),
+        })
+    if rows:
+        conn.execute(text("""
+            INSERT INTO insight_snapshots (channel_id, version, rules_version, source_id, kpis_fetched_at,
+                                           video_count, avg_engagement, health_score, subscriber_score,
+                                           content_score, engagement_score, payload)
+            VALUES (:channel_id,
+                    COALESCE((SELECT MAX(version) FROM insight_snapshots WHERE channel_id = :channel_id), 0) + 1,
+                    :rules_version, :source_id, :kpis_fetched_at, :video_count, :avg_engagement, :health_score,
+                    :subscriber_score, :content_score, :engagement_score, :payload)
+        """), rows)
+    return len(rows)
@@ -0,0 +1,175 @@
+"""
+Insight Rules for YouTube Analytics Dashboard
+Performance scores, grades, the channel health score and the recommendation
+rules, kept free of Streamlit so they can run anywhere a DataFrame exists.
+"""
+
+import json
+import youtube_trace as trace
+
+# Bump when a scoring or recommendation rule changes: stored insight snapshots
+# computed under older rules are then ignored until the next ingest rewrites them
+RULES_VERSION = 1
+TOP_PERFORMERS = 5
+PERFORMER_COLUMNS = ["title", "views", "likes", "comments", "performance_score", "grade"]
+
+
+def get_grade(score):
+    """Letter grade for a 0-100 performance score"""
+    if score >= 80: return "🏆 A+"
+    elif score >= 65: return "⭐ A"
+    elif score >= 50: return "👍 B"
+    elif score >= 35: return "📈 C"
+    else: return "💪 D"
+
+
+@trace.timed("transform.score_videos")
+def score_videos(videos):
+    """Add view/like/comment scores, a 0-100 performance_score and a grade"""
+    max_views = videos["views"].max() if videos["views"].max() > 0 else 1
+    max_likes = videos["likes"].max() if videos["likes"].max() > 0 else 1
+    max_comments = videos["comments"].max() if videos["comments"].max() > 0 else 1
+
+    # assign() only allocates the new score columns; the input frame is shared
+    scored = videos.assign(
+        view_score=(videos["views"] / max_views) * 40,
+        like_score=(videos["likes"] / max_likes) * 35,
+        comment_score=(videos["comments"] / max_comments) * 25,
+    )
+    scored["performance_score"] = (
+        scored["view_score"] + scored["like_score"] + scored["comment_score"]
+    ).round(1)
+    scored["grade"] = scored["performance_score"].apply(get_grade)
+    return scored
+
+
+@trace.timed("transform.engagement_summary")
+def engagement_summary(videos):
+    """Averages and ratios the recommendation rules are based on"""
+    total_views = max(videos["views"].sum(), 1)
+    return {
+        "video_count": len(videos),
+        "avg_views": float(videos["views"].mean()),
+        "avg_likes": float(videos["likes"].mean()),
+        "avg_engagement": float(videos["engagement_rate"].mean() * 100),
+        "like_view_ratio": float(videos["likes"].sum() / total_views * 100),
+        "comment_ratio": float(videos["comments"].sum() / total_views * 100),
+    }
+
+
+def build_recommendations(summary):
+    """Strategy recommendations (markdown strings) from an engagement summary"""
+    avg_engagement = summary["avg_engagement"]
+    avg_views = summary["avg_views"]
+    like_view_ratio = summary["like_view_ratio"]
+    comment_ratio = summary["comment_ratio"]
+    recommendations = []
+
+    # Engagement analysis
+    if avg_engagement < 2:
+        recommendations.append("📢 **Boost Engagement**: Your engagement rate is low. Try asking questions in your videos and encouraging comments!")
+    elif avg_engagement < 5:
+        recommendations.append("👍 **Good Engagement**: Your audience is responding. Keep interacting with comments to build community!")
+    else:
+        recommendations.append("🔥 **Amazing Engagement**: Your content resonates well! Consider going live to leverage this connection!")
+
+    # View analysis
+    if avg_views < 50:
+        recommendations.append("🎯 **Increase Visibility**: Focus on SEO - use better titles, descriptions, and tags. Share on social media!")
+    elif avg_views < 200:
+        recommendations.append("📈 **Growing Views**: You're on track! Consider collaborations to reach new audiences.")
+    else:
+        recommendations.append("🚀 **Great Reach**: Your content is being discovered. Maintain consistent upload schedule!")
+
+    # Like ratio analysis
+    if like_view_ratio < 2:
+        recommendations.append("💪 **Improve Like Ratio**: Only {:.1f}% of viewers like your videos. Add a call-to-action reminder!".format(like_view_ratio))
+    else:
+        recommendations.append("❤️ **Solid Like Ratio**: {:.1f}% like rate is healthy. Your content quality is good!".format(like_view_ratio))
+
+    # Comment analysis
+    if comment_ratio < 0.5:
+        recommendations.append("💬 **Encourage Discussion**: Ask thought-provoking questions to spark conversations!")
+    else:
+        recommendations.append("🗣️ **Active Community**: Your audience loves to engage. Reply to comments within 1 hour for maximum impact!")
+
+    # Content consistency
+    if summary["video_count"] >= 5:
+        recommendations.append("📅 **Consistency Tip**: Analyze your {0} videos and find patterns in your top performers.".format(summary["video_count"]))
+
+    return recommendations
+
+
+def build_action_items(summary):
+    """Up to five concrete next steps from an engagement summary"""
+    action_items = []
+
+    if summary["avg_engagement"] < 3:
+        action_items.append("Add 'Like & Subscribe' reminder in your next video")
+    if summary["like_view_ratio"] < 3:
+        action_items.append("Create a more compelling thumbnail for your next upload")
+    if summary["comment_ratio"] < 1:
+        action_items.append("End your next video with a question to viewers")
+    if summary["video_count"] < 10:
+        action_items.append("Upload more consistently - aim for 1-2 videos per week")
+    else:
+        action_items.append("Maintain your upload schedule - consistency builds audience")
+
+    action_items.append("Analyze your best performer and replicate its style")
+    action_items.append("Share your next video on 3 social platforms within 24 hours")
+    return action_items[:5]
+
+
+def health_score(subscribers, total_views, total_videos, avg_engagement):
+    """Channel health (0-100) and its three components"""
+    views_per_video = total_views / max(total_videos, 1)
+    subscriber_score = min(30, subscribers / 100 * 30)      # max 30
+    content_score = min(40, views_per_video / 100 * 40)     # max 40
+    engagement_score = min(30, avg_engagement * 6)          # max 30
+    return {
+        "health_score": min(100, subscriber_score + content_score + engagement_score),
+        "subscriber_score": subscriber_score,
+        "content_score": content_score,
+        "engagement_score": engagement_score,
+    }
+
+
+def health_message(score):
+    if score >= 70:
+        return "🌟 Excellent! Keep up the great work!"
+    if score >= 50:
+        return "📈 Good progress! Room to grow!"
+    return "💪 Building momentum! Stay consistent!"
+
+
+
+def _performer(row):
+    return {"title": str(row["title"]), "performance_score": float(row["performance_score"])}
+
+
+@trace.timed("transform.channel_insights")
+def channel_insights(videos, subscribers=None, total_views=None, total_videos=None):
+    """Everything the insight and health sections show, as JSON-ready values
+
+    videos should hold one row per video (already scored ones are used as
+    they are). Health is left out when the channel totals are unknown.
+    """
+    scored = videos if "performance_score" in videos.columns else score_videos(videos)
+    summary = engagement_summary(videos)
+    top = scored.nlargest(TOP_PERFORMERS, "performance_score")[PERFORMER_COLUMNS]
+    insights = {
+        "summary": summary,
+        "top_performers": json.loads(top.to_json(orient="records")),
+        "best": None,
+        "worst": None,
+        "recommendations": build_recommendations(summary),
+        "action_items": build_action_items(summary),
+        "health": None,
+    }
+    if len(scored) >= 3:
+        insights["best"] = _performer(scored.loc[scored["performance_score"].idxmax()])
+        insights["worst"] = _performer(scored.loc[scored["performance_score"].idxmin()])
+    if subscribers is not None:
+        insights["health"] = health_score(int(subscribers), int(total_views or 0), int(total_videos or 0),
+                                          summary["avg_engagement"])
+    return insights
@@ -0,0 +1,94 @@
+"""
+Background Refresh Jobs for YouTube Analytics Dashboard
+Runs fetch_youtube_data() in a worker thread so a refresh never blocks a
+dashboard session. Jobs live in a process-wide registry shared by every
+session, so two viewers clicking refresh share one job instead of two.
+"""
+
+import threading
+import time
+import uuid
+import youtube_trace as trace
+
+_jobs = {}
+_lock = threading.Lock()
+_data_version = 0
+
+
+class RefreshJob:
+    """Progress and outcome of one background refresh"""
+
+    def __init__(self, key, channel_ids):
+        self.job_id = uuid.uuid4().hex[:8]
+        self.key = key
+        self.channel_ids = channel_ids
+        self.status = "running"  # running | succeeded | failed
+        self.channels_done = 0
+        self.channels_total = len(channel_ids or [])
+        self.videos_fetched = 0
+        self.errors = []
+        self.started_at = time.time()
+        self.finished_at = None
+        self.spans = []  # API call / DB write timings (see youtube_trace.py)
+
+    @property
+    def running(self):
+        return self.status == "running"
+
+    def update(self, progress):
+        """Progress callback handed to fetch_youtube_data()"""
+        with _lock:
+            self.channels_done = progress["channels_done"]
+            self.channels_total = progress["channels_total"]
+            self.videos_fetched = progress["videos_fetched"]
+            self.errors = list(progress["errors"])
+
+
+def _run(job):
+    global _data_version
+    error = None
+    try:
+        from youtube_fetch import fetch_youtube_data
+        # A handful of spans per API call is noise next to the network round trip,
+        # so refresh jobs always keep theirs for the dashboard's debug panel
+        with trace.collect() as spans:
+            job.spans = spans
+            ok = fetch_youtube_data(channel_ids=job.channel_ids, progress=job.update)
+    except Exception as e:
+        ok, error = False, str(e)
+    with _lock:
+        if error:
+            job.errors.append(error)
+        job.status = "succeeded" if ok else "failed"
+        job.finished_at = time.time()
+        # Bump even on partial failure: whatever channels did land should show up
+        _data_version += 1
+
+
+def start_refresh(key="default", channel_ids=None):
+    """Start a background refresh unless one with the same key is running
+
+    Returns (job, started) where started is False if an existing job was reused.
+    """
+    if channel_ids is None:
+        from youtube_fetch import CHANNEL_IDS
+        channel_ids = CHANNEL_IDS
+    with _lock:
+        job = _jobs.get(key)
+        if job is not None and job.running:
+            return job, False
+        job = RefreshJob(key, channel_ids)
+        _jobs[key] = job
+    threading.Thread(target=_run, args=(job,), name=f"refresh-{job.job_id}", daemon=True).start()
+    return job, True
+
+
+def get_job(key="default"):
+    """Latest job for key (running or finished), or None"""
+    with _lock:
+        return _jobs.get(key)
+
+
+def data_version():
+    """Counter bumped whenever a refresh finishes; use it as a cache key to hot-swap data"""
+    return _data_version
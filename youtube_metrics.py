@@ -0,0 +1,206 @@
+"""
+Prometheus Metrics for the YouTube ingestion pipeline
+Counters, gauges and histograms kept in process memory and served in the
+Prometheus text exposition format on a small local HTTP endpoint:
+
+    python youtube_fetch.py --metrics-port 9108 --interval 900
+
+Metrics are plain dict updates under a lock, so the fetcher records them
+unconditionally; only the HTTP endpoint is optional. Worker processes (see
+youtube_ingest.py) drain() their samples and the parent merge()s them, so
+the one endpoint covers the whole pipeline.
+"""
+
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import math
+import threading
+import time
+
+_lock = threading.Lock()
+REGISTRY = []
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class: one metric family, with one sample series per label combination"""
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def value(self, **labels):
+        with _lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name, key, value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+    def _merge(self, values):
+        """Fold another process's samples in (gauges: last write wins); called under _lock"""
+        self._values.update(values)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _merge(self, values):
+        for key, value in values.items():
+            self._values[key] = self._values.get(key, 0) + value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=(0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10)):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock seconds spent in the block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _merge(self, values):
+        for key, (counts, total) in values.items():
+            mine, my_total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            self._values[key] = ([a + b for a, b in zip(mine, counts)], my_total + total)
+
+    def value(self, **labels):
+        """(cumulative bucket counts, sum) for one label combination"""
+        with _lock:
+            counts, total = self._values.get(self._key(labels), ([0] * len(self.buckets), 0.0))
+            return list(counts), total
+
+    def samples(self):
+        for key, (counts, total) in self._values.items():
+            for bound, count in zip(self.buckets, counts):
+                yield f"{self.name}_bucket", key + (("le", _format_value(bound)),), count
+            yield f"{self.name}_sum", key, total
+            yield f"{self.name}_count", key, counts[-1]
+
+
+# ----------------- INGESTION METRICS -----------------
+SWEEP_SECONDS = Histogram("youtube_sweep_duration_seconds", "Wall-clock duration of one fetch sweep over all channels",
+                          buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600))
+SWEEPS = Counter("youtube_sweeps_total", "Fetch sweeps finished, by outcome", ["status"])
+API_CALLS = Counter("youtube_api_calls_total", "YouTube Data API requests, by method", ["method"])
+API_ERRORS = Counter("youtube_api_errors_total", "YouTube Data API requests that raised, by method", ["method"])
+QUOTA_UNITS = Counter("youtube_api_quota_units_total", "YouTube Data API quota units spent, by method", ["method"])
+ROWS_WRITTEN = Counter("youtube_rows_written_total", "Rows inserted into SQLite, by table", ["table"])
+ROWS_SKIPPED = Counter("youtube_rows_skipped_total", "API items not written, by reason", ["reason"])
+DB_COMMIT_SECONDS = Histogram("youtube_db_commit_seconds", "Latency of SQLite write transactions, by table", ["table"],
+                              buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+CHANNEL_LAST_SUCCESS = Gauge("youtube_channel_last_success_timestamp_seconds",
+                             "Unix time of the last successful fetch, by channel", ["channel_id"])
+
+
+def drain():
+    """Every metric's samples by name, resetting them to zero (a worker process ships these to its parent)"""
+    with _lock:
+        drained = {metric.name: metric._values for metric in REGISTRY if metric._values}
+        for metric in REGISTRY:
+            metric._values = {}
+    return drained
+
+
+def merge(drained):
+    """Fold samples drained in another process into this process's metrics"""
+    metrics = {metric.name: metric for metric in REGISTRY}
+    with _lock:
+        for name, values in drained.items():
+            if name in metrics:
+                metrics[name]._merge(values)
+
+
+def render():
+    """Every registered metric in the Prometheus text exposition format"""
+    with _lock:
+        lines = [line for metric in REGISTRY for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        payload = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, addr="127.0.0.1"):
+    """Serve /metrics from a background thread; returns the server
+
+    Only local clients can scrape it unless addr says otherwise (e.g. "0.0.0.0").
+    """
+    server = ThreadingHTTPServer((addr, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,219 @@
+"""
+Payload Budgets for YouTube Analytics Dashboard
+Every rerun ships each chart to the browser as Plotly JSON and each table as
+Arrow, so page weight grows with the catalog. Before anything is sent, the
+dashboard measures its serialized size and keeps it within a budget:
+
+- scatter/line traces above CHART_MAX_POINTS points are sampled (evenly
+  spaced, so time order and the endpoints survive; the largest bubbles are
+  always kept) and switch to WebGL (scattergl) above WEBGL_POINTS points
+- pie charts fold the slices past PIE_MAX_SLICES into "Other"
+- a figure still over CHART_BUDGET_KB is sampled (or its bars trimmed) down
+  to fit; a table over TABLE_BUDGET_KB keeps its first rows, and unused
+  categories are dropped so Arrow does not ship their whole dictionary
+
+Budgets come from the environment:
+
+    YOUTUBE_CHART_BUDGET_KB=250 YOUTUBE_TABLE_BUDGET_KB=500 streamlit run youtube_dashboard.py
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import pyarrow as pa
+
+CHART_BUDGET_KB = float(os.getenv("YOUTUBE_CHART_BUDGET_KB", 500))
+TABLE_BUDGET_KB = float(os.getenv("YOUTUBE_TABLE_BUDGET_KB", 1000))
+CHART_MAX_POINTS = int(os.getenv("YOUTUBE_CHART_MAX_POINTS", 5000))
+WEBGL_POINTS = 1000       # same cut-over plotly express uses for render_mode="auto"
+PIE_MAX_SLICES = 10
+MIN_POINTS = 100          # never sample a trace below this
+TABLE_SAMPLE_ROWS = 1000  # rows serialized to estimate a large table's size
+FIT_PASSES = 3            # re-measure / reduce rounds for a figure over budget
+
+SAMPLED_TYPES = ("scatter", "scattergl")
+
+
+def _points(trace):
+    for key in ("x", "y", "values"):
+        value = getattr(trace, key, None)
+        if value is not None:
+            return len(value)
+    return 0
+
+
+def _sliced(props, n, idx):
+    """The per-point arrays (length n) in a trace's properties, indexed by idx"""
+    out = {}
+    for key, value in props.items():
+        if key == "type":
+            continue
+        if isinstance(value, dict):
+            nested = _sliced(value, n, idx)
+            if nested:
+                out[key] = nested
+        elif isinstance(value, (list, tuple, np.ndarray)) and len(value) == n:
+            out[key] = np.asarray(value)[idx]
+    return out
+
+
+def _sample_index(trace, n, keep):
+    """Evenly spaced positions (endpoints included) plus, for bubbles, the largest markers"""
+    idx = np.linspace(0, n - 1, keep).round().astype(int)
+    size = trace.marker.size if "markers" in (trace.mode or "markers") else None
+    if size is not None and np.ndim(size) == 1 and len(size) == n:
+        largest = np.argpartition(-np.asarray(size, dtype="float64"), keep // 10)[:keep // 10]
+        idx = np.union1d(idx, largest)
+    return np.unique(idx)
+
+
+def _sample(fig, max_points):
+    """Sample the scatter/line traces to about max_points points in total; returns (kept, before)"""
+    traces = [t for t in fig.data if t.type in SAMPLED_TYPES]
+    before = sum(_points(t) for t in traces)
+    if before <= max_points:
+        return before, before
+    ratio = max_points / before
+    kept = 0
+    for trace in traces:
+        n = _points(trace)
+        keep = max(int(n * ratio), min(n, MIN_POINTS))
+        if keep < n:
+            idx = _sample_index(trace, n, keep)
+            trace.update(_sliced(trace.to_plotly_json(), n, idx))
+            n = len(idx)
+        kept += n
+    return kept, before
+
+
+def _trim_bars(fig, ratio):
+    """Keep the first share of each bar trace's bars (charts here are already ranked)"""
+    trimmed = 0
+    for trace in fig.data:
+        n = _points(trace)
+        if trace.type == "bar" and n > 1:
+            keep = max(int(n * ratio), 1)
+            trace.update(_sliced(trace.to_plotly_json(), n, np.arange(keep)))
+            trimmed += n - keep
+    return trimmed
+
+
+def _fold_pies(fig, max_slices):
+    """Fold the smallest pie slices into one "Other" slice; returns how many were folded"""
+    folded = 0
+    for trace in fig.data:
+        n = _points(trace)
+        if trace.type != "pie" or trace.labels is None or n <= max_slices:
+            continue
+        values = np.asarray(trace.values, dtype="float64")
+        order = np.argsort(-values)
+        head, tail = order[:max_slices - 1], order[max_slices - 1:]
+        trace.update(labels=list(np.asarray(trace.labels)[head]) + ["Other"],
+                     values=list(values[head]) + [values[tail].sum()])
+        folded += len(tail)
+    return folded
+
+
+def _to_webgl(fig):
+    """Rebuild large SVG scatter traces as scattergl; returns the figure and whether it changed"""
+    if not any(t.type == "scatter" and _points(t) > WEBGL_POINTS for t in fig.data):
+        return fig, False
+    data = [go.Scattergl({k: v for k, v in t.to_plotly_json().items() if k != "type"}, skip_invalid=True)
+            if t.type == "scatter" and _points(t) > WEBGL_POINTS else t for t in fig.data]
+    return go.Figure(data=data, layout=fig.layout), True
+
+
+def figure_bytes(fig):
+    """Size of the figure JSON st.plotly_chart sends"""
+    return len(pio.to_json(fig, validate=False).encode("utf-8"))
+
+
+def fit_figure(fig, budget_kb=CHART_BUDGET_KB, max_points=CHART_MAX_POINTS):
+    """Bring a figure within its point and byte budgets; returns (fig, bytes, notes)"""
+    notes = []
+    kept, before = _sample(fig, max_points)
+    folded = _fold_pies(fig, PIE_MAX_SLICES)
+    if folded:
+        notes.append(f"{folded:,} smallest slices grouped as Other")
+    fig, _ = _to_webgl(fig)
+
+    size = figure_bytes(fig)
+    budget = budget_kb * 1024
+    trimmed = 0
+    # Layout and template bytes do not shrink with the data, so one pass can fall short
+    for _ in range(FIT_PASSES):
+        if size <= budget:
+            break
+        ratio = budget / size * 0.9
+        cut = _trim_bars(fig, ratio)
+        now_kept, _ = _sample(fig, max(int(kept * ratio), MIN_POINTS))
+        if not cut and now_kept == kept:
+            break   # nothing left to reduce (e.g. a heatmap)
+        trimmed, kept = trimmed + cut, now_kept
+        size = figure_bytes(fig)
+    if trimmed:
+        notes.append(f"{trimmed:,} bars past the budget left out")
+    if kept < before:
+        notes.insert(0, f"sampled {kept:,} of {before:,} points")
+    return fig, size, notes
+
+
+def table_bytes(df):
+    """Size of the Arrow IPC stream st.dataframe sends for df"""
+    table = pa.Table.from_pandas(df)
+    sink = pa.MockOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.size()
+
+
+def _without_unused_categories(df):
+    """Arrow sends a categorical's whole dictionary, so drop the categories no row uses"""
+    categorical = [col for col, dtype in df.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    if not categorical:
+        return df
+    return df.assign(**{col: df[col].cat.remove_unused_categories() for col in categorical})
+
+
+def fit_table(df, budget_kb=TABLE_BUDGET_KB):
+    """Keep the first rows of df that fit the byte budget; returns (df, bytes, note)
+
+    The budget is a hard limit: a first cut is estimated from a sample of
+    rows, then the table is trimmed and re-measured until it fits.
+    """
+    budget = budget_kb * 1024
+    total = len(df)
+    if total > TABLE_SAMPLE_ROWS:
+        head = _without_unused_categories(df.head(TABLE_SAMPLE_ROWS))
+        per_row = table_bytes(head) / TABLE_SAMPLE_ROWS
+        if per_row * total > budget:
+            df = df.head(max(int(budget / per_row * 0.95), 1))
+    df = _without_unused_categories(df)
+    size = table_bytes(df)
+    while size > budget and len(df):
+        # Categories of the rows cut off are pruned each round, or their dictionary still ships
+        rows = min(int(len(df) * budget / size * 0.95), len(df) - 1)
+        df = _without_unused_categories(df.head(max(rows, 0)))
+        size = table_bytes(df)
+    note = f"showing the first {len(df):,} of {total:,} rows" if len(df) < total else None
+    return df, size, note
+
+
+def section_bytes(records):
+    """Bytes sent per dashboard section from a rerun's trace records
+
+    Chart and table spans are emitted inside a section and the section's lap
+    span when it closes, so each lap owns the payload spans just before it.
+    """
+    sections, pending = {}, 0
+    for record in records:
+        name = record["span"]
+        if name.startswith(("chart.", "table.")):
+            pending += record.get("bytes") or 0
+        elif name.startswith("section."):
+            if pending:
+                sections[name.split(".", 1)[1]] = sections.get(name.split(".", 1)[1], 0) + pending
+            pending = 0
+    return sections
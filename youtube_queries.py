@@ -0,0 +1,255 @@
+"""
+Dashboard Queries for YouTube Analytics Dashboard
+Every read the dashboard makes, as plain functions returning DataFrames.
+The Streamlit page wraps these in its caches; reports and benchmarks call
+them directly without Streamlit.
+
+The heavy aggregations also have a DuckDB version (see youtube_duckdb.py),
+used when YOUTUBE_QUERY_BACKEND=duckdb and the duckdb package is installed;
+SQLite is the default.
+"""
+
+import json
+import os
+import pandas as pd
+from sqlalchemy import text
+from youtube_db import get_engine
+from youtube_insights import RULES_VERSION
+from youtube_topics import search_video_ids
+import youtube_duckdb
+import youtube_trace as trace
+
+QUERY_BACKEND = os.getenv("YOUTUBE_QUERY_BACKEND", "sqlite").strip().lower()
+if QUERY_BACKEND == "duckdb" and not youtube_duckdb.available():
+    print("⚠️  YOUTUBE_QUERY_BACKEND=duckdb but duckdb is not installed; using SQLite")
+    QUERY_BACKEND = "sqlite"
+
+# Repeated strings become categoricals, counters are downcast and timestamps are
+# parsed once at load, so every rerun works off the same compact frames.
+CATEGORY_COLS = ["channel_id", "channel_name", "video_id", "title"]
+COUNTER_COLS = ["id", "subscribers", "total_views", "total_videos", "views", "likes", "dislikes", "comments"]
+DATE_COLS = ["fetched_at", "published_at"]
+
+
+def compact_frame(df):
+    """Convert a raw SQL frame to compact dtypes"""
+    for col in df.columns:
+        if col in CATEGORY_COLS:
+            df[col] = df[col].astype("category")
+        elif col in COUNTER_COLS:
+            df[col] = pd.to_numeric(pd.to_numeric(df[col], errors="coerce").fillna(0), downcast="integer")
+        elif col in DATE_COLS:
+            df[col] = pd.to_datetime(df[col], errors="coerce", utc=True, format="ISO8601").dt.tz_localize(None)
+    return df
+
+
+@trace.timed("transform.prepare_videos")
+def prepare_videos(videos):
+    """Compact the video frame, add derived columns and sort it by publish date for slicing"""
+    for col in ["views", "likes", "dislikes", "comments"]:
+        if col not in videos.columns:
+            videos[col] = 0
+    videos = compact_frame(videos)
+    videos["engagement_rate"] = (
+        (videos["likes"].astype("float32") + videos["comments"]) /
+        videos["views"].astype("float32").replace({0: float("nan")})
+    ).fillna(0).astype("float32")
+    sort_col = "published_at" if "published_at" in videos.columns else "fetched_at"
+    if sort_col in videos.columns:
+        videos = videos.sort_values(sort_col, kind="stable").reset_index(drop=True)
+    return videos
+
+
+def _channel_where(channel_id, keyword="WHERE", marker=":"):
+    if channel_id:
+        return f"{keyword} channel_id = {marker}channel_id", {"channel_id": channel_id}
+    return "", {}
+
+
+def _use_duckdb(backend):
+    return (backend or QUERY_BACKEND) == "duckdb"
+
+
+@trace.timed("sql.load_tables")
+def load_tables(channel_id=None):
+    """Latest channel row, channel history and video snapshots for one channel (or all)"""
+    where, params = _channel_where(channel_id)
+    with get_engine().connect() as conn:
+        channel_latest = compact_frame(pd.read_sql(text(f"SELECT * FROM channel_stats {where} ORDER BY fetched_at DESC LIMIT 1"), conn, params=params))
+        channel_history = compact_frame(pd.read_sql(text(f"SELECT * FROM channel_stats {where} ORDER BY fetched_at ASC"), conn, params=params))
+        videos = prepare_videos(pd.read_sql(text(f"SELECT * FROM video_stats {where} ORDER BY fetched_at DESC"), conn, params=params))
+    return channel_latest, channel_history, videos
+
+
+@trace.timed("sql.load_latest_videos")
+def load_latest_videos(channel_id=None):
+    """Latest snapshot of every video, one row each, from the video_latest rollup"""
+    where, params = _channel_where(channel_id)
+    return prepare_videos(pd.read_sql(text(f"""
+        SELECT channel_id, video_id, title, published_at, fetched_at, views, likes, dislikes, comments,
+               views_per_hour, views_velocity
+        FROM video_latest {where}
+    """), get_engine(), params=params))
+
+
+@trace.timed("transform.filter_by_date")
+def filter_by_date(videos, date_col, start_date, end_date):
+    """Rows of a date-sorted frame within [start_date, end_date], as a positional slice (a view)"""
+    start_ts = pd.to_datetime(start_date)
+    end_ts = pd.to_datetime(end_date) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    dates = videos[date_col].to_numpy()
+    lo = dates.searchsorted(start_ts.to_datetime64(), side="left")
+    hi = dates.searchsorted(end_ts.to_datetime64(), side="right")
+    return videos.iloc[lo:hi]
+
+
+@trace.timed("sql.load_channel_kpis")
+def load_channel_kpis():
+    """One indexed read of the channel_kpis rollup table"""
+    return pd.read_sql("SELECT * FROM channel_kpis ORDER BY subscribers DESC", get_engine())
+
+
+@trace.timed("sql.load_alerts")
+def load_alerts(channel_id=None, limit=20):
+    """Most recent alerts, newest first"""
+    where, params = _channel_where(channel_id)
+    return pd.read_sql(text(f"""
+        SELECT entity_type, entity_id, metric, kind, observed, expected, zscore, snapshot_at
+        FROM alerts {where}
+        ORDER BY snapshot_at DESC
+        LIMIT :limit
+    """), get_engine(), params={**params, "limit": limit})
+
+
+@trace.timed("sql.load_hashtag_stats")
+def load_hashtag_stats(limit=200):
+    """Most-used hashtags with their precomputed aggregates"""
+    return pd.read_sql(text("SELECT * FROM hashtag_stats ORDER BY video_count DESC LIMIT :limit"),
+                       get_engine(), params={"limit": limit})
+
+
+@trace.timed("sql.search_videos")
+def search_videos(keywords="", tags=()):
+    """Video ids matching the topic filters (None when no filter is set)"""
+    with get_engine().connect() as conn:
+        return search_video_ids(conn, keywords, tags)
+
+
+def snapshot_version():
+    """Cheap marker that moves whenever new video snapshots are rolled up"""
+    with get_engine().connect() as conn:
+        return conn.execute(text("SELECT last_id FROM rollup_state WHERE name = 'video_latest'")).scalar() or 0
+
+
+@trace.timed("sql.load_publish_heatmap")
+def load_publish_heatmap(channel_id=None, backend=None):
+    """Weekday x hour (UTC) aggregates of latest-snapshot views and engagement"""
+    if _use_duckdb(backend):
+        where, params = _channel_where(channel_id, "AND", "$")
+        # dayofweek() numbers Sunday as 0, like SQLite's strftime('%w')
+        return youtube_duckdb.query(f"""
+            SELECT dayofweek(published_at) AS weekday,
+                   hour(published_at) AS hour,
+                   count(*) AS videos,
+                   avg(views) AS mean_views,
+                   median(views) AS median_views,
+                   sum(likes + comments) / greatest(sum(views), 1) AS engagement_rate
+            FROM video_latest
+            WHERE published_at IS NOT NULL {where}
+            GROUP BY ALL
+        """, params)
+    where, params = _channel_where(channel_id, "AND")
+    return pd.read_sql(text(f"""
+        WITH slots AS (
+            SELECT CAST(strftime('%w', published_at) AS INTEGER) AS weekday,
+                   CAST(strftime('%H', published_at) AS INTEGER) AS hour,
+                   views, likes, comments
+            FROM video_latest
+            WHERE published_at IS NOT NULL {where}
+        ),
+        ranked AS (
+            SELECT *,
+                   ROW_NUMBER() OVER (PARTITION BY weekday, hour ORDER BY views) AS rn,
+                   COUNT(*) OVER (PARTITION BY weekday, hour) AS cnt
+            FROM slots
+        )
+        SELECT weekday, hour,
+               COUNT(*) AS videos,
+               AVG(views) AS mean_views,
+               AVG(CASE WHEN rn IN ((cnt + 1) / 2, (cnt + 2) / 2) THEN views END) AS median_views,
+               1.0 * SUM(likes + comments) / MAX(SUM(views), 1) AS engagement_rate
+        FROM ranked
+        GROUP BY weekday, hour
+    """), get_engine(), params=params)
+
+
+@trace.timed("sql.load_monthly_rollup")
+def load_monthly_rollup(channel_id=None, backend=None):
+    """Last subscriber and view counts of each month, per channel, from the channel history"""
+    if _use_duckdb(backend):
+        where, params = _channel_where(channel_id, marker="$")
+        return youtube_duckdb.query(f"""
+            SELECT channel_id,
+                   date_trunc('month', fetched_at) AS month,
+                   arg_max(subscribers, fetched_at) AS subscribers,
+                   arg_max(total_views, fetched_at) AS total_views
+            FROM channel_stats {where}
+            GROUP BY ALL
+            ORDER BY channel_id, month
+        """, params)
+    where, params = _channel_where(channel_id)
+    monthly = pd.read_sql(text(f"""
+        SELECT channel_id, month, subscribers, total_views
+        FROM (
+            SELECT channel_id, strftime('%Y-%m-01', fetched_at) AS month, subscribers, total_views,
+                   ROW_NUMBER() OVER (PARTITION BY channel_id, strftime('%Y-%m', fetched_at)
+                                      ORDER BY fetched_at DESC) AS rn
+            FROM channel_stats {where}
+        )
+        WHERE rn = 1
+        ORDER BY channel_id, month
+    """), get_engine(), params=params)
+    monthly["month"] = pd.to_datetime(monthly["month"])
+    return monthly
+
+
+@trace.timed("sql.load_insight_snapshot")
+def load_insight_snapshot(channel_id):
+    """Latest insight snapshot of a channel under the current rules, as a dict (None if there is none)"""
+    with get_engine().connect() as conn:
+        row = conn.execute(text("""
+            SELECT version, computed_at, payload
+            FROM insight_snapshots
+            WHERE channel_id = :channel_id AND rules_version = :rules_version
+            ORDER BY id DESC
+            LIMIT 1
+        """), {"channel_id": channel_id, "rules_version": RULES_VERSION}).first()
+    if row is None:
+        return None
+    return {**json.loads(row.payload), "version": row.version, "computed_at": row.computed_at}
+
+
+@trace.timed("sql.load_health_history")
+def load_health_history(channel_id):
+    """Health score and its components from every insight snapshot of a channel, oldest first"""
+    history = pd.read_sql(text("""
+        SELECT computed_at, version, health_score, subscriber_score, content_score, engagement_score, avg_engagement
+        FROM insight_snapshots
+        WHERE channel_id = :channel_id
+        ORDER BY id
+    """), get_engine(), params={"channel_id": channel_id})
+    history["computed_at"] = pd.to_datetime(history["computed_at"])
+    return history
+
+
+@trace.timed("sql.load_trending")
+def load_trending(channel_id=None, limit=10):
+    """Top videos by current views/hour, read straight off the velocity index"""
+    where, params = _channel_where(channel_id)
+    return pd.read_sql(text(f"""
+        SELECT title, views, views_velocity, views_per_hour, likes_per_hour, comments_per_hour,
+               delta_views, delta_hours, fetched_at
+        FROM video_latest {where}
+        ORDER BY views_velocity DESC
+        LIMIT :limit
+    """), get_engine(), params={**params, "limit": limit})
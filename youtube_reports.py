@@ -0,0 +1,222 @@
+"""
+Batch Channel Reports for YouTube Analytics Dashboard
+Computes the dashboard's KPIs, performance scores, health score and
+recommendations for many channels straight from the database (no Streamlit)
+and writes one JSON, CSV and HTML report per channel:
+
+    python youtube_reports.py                          # every tracked channel
+    python youtube_reports.py --channels id_one,id_two --formats json,html
+    python youtube_reports.py --workers 16 --out /srv/reports/nightly
+
+Channels are fanned out across a process pool; each worker reads the
+precomputed rollups (channel_kpis, video_latest, alerts) for its channel, so
+a run over hundreds of channels is bound by cores, not by SQLite.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import html
+import json
+import multiprocessing
+import os
+import re
+import time
+import pandas as pd
+from youtube_insights import channel_insights, score_videos, health_message
+import youtube_queries as queries
+
+FORMATS = ("json", "csv", "html")
+TOP_VIDEOS = 10
+ALERT_LIMIT = 20
+ALERT_LABELS = {"spike": "📈 Spike", "drop": "📉 Drop", "trend_up": "🚀 Growth speeding up",
+                "trend_down": "🐢 Growth slowing down"}
+VIDEO_COLUMNS = ["video_id", "title", "published_at", "views", "likes", "comments", "engagement_rate",
+                 "views_velocity", "performance_score", "grade"]
+
+
+def _safe_name(channel_id):
+    """Channel id usable as a file name"""
+    return re.sub(r"[^\w.-]", "_", str(channel_id))
+
+
+def _records(df):
+    """JSON-ready records (timestamps as ISO strings, NaN as null)"""
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+def _titled_alerts(alerts, videos):
+    """Alerts with the video title (or "Channel") the dashboard shows for each entity"""
+    titles = dict(zip(videos["video_id"].astype(str), videos["title"].astype(str)))
+    names = [titles.get(row.entity_id, row.entity_id) if row.entity_type == "video" else "Channel"
+             for row in alerts.itertuples()]
+    return alerts.assign(title=names)
+
+
+def build_report(kpis):
+    """Report dict for one channel, given its channel_kpis row; videos come back as a scored frame"""
+    channel_id = kpis["channel_id"]
+    videos = queries.load_latest_videos(channel_id)
+    report = {
+        "channel_id": channel_id,
+        "channel_name": kpis.get("channel_name"),
+        "generated_at": pd.Timestamp.now(tz="UTC").isoformat(timespec="seconds"),
+        "kpis": kpis,
+    }
+    if videos.empty:
+        report.update(summary=None, health=None, recommendations=[], action_items=[], top_videos=[], alerts=[])
+        return report, videos
+
+    scored = score_videos(videos)
+    # Same insights the dashboard and the ingest-time snapshots show
+    insights = channel_insights(scored, kpis.get("subscribers") or 0, kpis.get("total_views"), kpis.get("total_videos"))
+    health = insights["health"]
+    health["message"] = health_message(health["health_score"])
+    top = scored.nlargest(TOP_VIDEOS, "performance_score")[VIDEO_COLUMNS]
+    report.update(
+        summary=insights["summary"],
+        health=health,
+        recommendations=insights["recommendations"],
+        action_items=insights["action_items"],
+        top_videos=_records(top),
+        alerts=_records(_titled_alerts(queries.load_alerts(channel_id, limit=ALERT_LIMIT), videos)),
+    )
+    return report, scored
+
+
+# ---- Writers ----
+
+def _markdown_bold(text):
+    return re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", html.escape(text))
+
+
+def render_html(report):
+    """Stand-alone HTML page for one channel report"""
+    kpis = report["kpis"]
+    health = report["health"] or {}
+    summary = report["summary"] or {}
+    rows = "".join(f"<tr><th>{html.escape(label)}</th><td>{value}</td></tr>" for label, value in [
+        ("Subscribers", f"{kpis.get('subscribers') or 0:,}"),
+        ("Total views", f"{kpis.get('total_views') or 0:,}"),
+        ("Total videos", f"{kpis.get('total_videos') or 0:,}"),
+        ("Subscriber growth / day", f"{kpis.get('subs_growth_per_day') or 0:,.1f}"),
+        ("Avg views / video", f"{summary.get('avg_views', 0):,.0f}"),
+        ("Avg engagement", f"{summary.get('avg_engagement', 0):.2f}%"),
+    ])
+    top = pd.DataFrame(report["top_videos"])
+    top_table = top.to_html(index=False, border=0, classes="videos") if not top.empty else "<p>No videos yet.</p>"
+    recommendations = "".join(f"<li>{_markdown_bold(rec)}</li>" for rec in report["recommendations"])
+    actions = "".join(f"<li>{html.escape(item)}</li>" for item in report["action_items"])
+    alerts = "".join(
+        f"<li><b>{html.escape(ALERT_LABELS.get(a['kind'], a['kind']))}</b> in {html.escape(a['metric'].replace('_', ' '))} • "
+        f"{html.escape(str(a['title']))} • {a['observed']:,.1f}/h vs {a['expected']:,.1f}/h expected "
+        f"(z = {a['zscore']:+.1f}) • {html.escape(str(a['snapshot_at']))}</li>"
+        for a in report["alerts"]) or "<li>No anomalies detected so far. 🎉</li>"
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(str(report['channel_name']))} • YouTube report</title>
+<style>
+body {{ font-family: sans-serif; max-width: 960px; margin: 2em auto; color: #222; }}
+table {{ border-collapse: collapse; margin-bottom: 1.5em; }}
+th, td {{ padding: 4px 10px; border-bottom: 1px solid #ddd; text-align: left; }}
+.health {{ font-size: 48px; font-weight: bold; color: #2ba8ea; }}
+</style></head><body>
+<h1>📺 {html.escape(str(report['channel_name']))}</h1>
+<p><small>{html.escape(str(report['channel_id']))} • generated {report['generated_at']}</small></p>
+<h2>💚 Channel Health</h2>
+<div class="health">{health.get('health_score', 0):.0f}</div>
+<p>{html.escape(health.get('message', 'No videos yet.'))}</p>
+<h2>📊 KPIs</h2>
+<table>{rows}</table>
+<h2>🏆 Top Videos</h2>
+{top_table}
+<h2>🤖 Smart Recommendations</h2>
+<ul>{recommendations}</ul>
+<h2>✅ Action Items</h2>
+<ul>{actions}</ul>
+<h2>🚨 Anomaly Alerts</h2>
+<ul>{alerts}</ul>
+</body></html>
+"""
+
+
+def write_report(kpis, out_dir, formats=FORMATS):
+    """Build and write one channel's report files; returns a one-line summary for the index"""
+    started = time.time()
+    try:
+        report, scored = build_report(kpis)
+        base = os.path.join(out_dir, _safe_name(kpis["channel_id"]))
+        if "json" in formats:
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+        if "csv" in formats:
+            scored.reindex(columns=VIDEO_COLUMNS).sort_values("performance_score", ascending=False) \
+                .to_csv(base + "_videos.csv", index=False)
+        if "html" in formats:
+            with open(base + ".html", "w", encoding="utf-8") as f:
+                f.write(render_html(report))
+        health = report["health"] or {}
+        return {"channel_id": kpis["channel_id"], "channel_name": kpis.get("channel_name"),
+                "videos": len(scored), "health_score": health.get("health_score"),
+                "seconds": round(time.time() - started, 3), "error": None}
+    except Exception as e:
+        return {"channel_id": kpis["channel_id"], "channel_name": kpis.get("channel_name"),
+                "videos": 0, "health_score": None, "seconds": round(time.time() - started, 3), "error": str(e)}
+
+
+def _write_report_task(args):
+    return write_report(*args)
+
+
+def generate_reports(channel_ids=None, out_dir="reports", formats=FORMATS, workers=None):
+    """Write reports for channel_ids (default: every channel in channel_kpis); returns the index frame"""
+    kpis = queries.load_channel_kpis()
+    if channel_ids:
+        kpis = kpis[kpis["channel_id"].isin(channel_ids)]
+        missing = sorted(set(channel_ids) - set(kpis["channel_id"]))
+        for channel_id in missing:
+            print(f"⚠️  No KPIs for channel {channel_id} (not fetched yet?)")
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [(row, out_dir, tuple(formats)) for row in _records(kpis)]
+    if not tasks:
+        print("⚠️  No channels to report on.")
+        return pd.DataFrame()
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    print(f"🧮 Building {len(tasks)} channel report(s) on {workers} worker(s)...")
+    if workers == 1:
+        results = [_write_report_task(task) for task in tasks]
+    else:
+        # Small chunks keep every core busy even when channel sizes are skewed
+        chunksize = max(1, len(tasks) // (workers * 8))
+        # Spawned like the ingest pool: forked workers would inherit this process's SQLite state
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(_write_report_task, tasks, chunksize=chunksize))
+
+    index = pd.DataFrame(results)
+    index.to_csv(os.path.join(out_dir, "index.csv"), index=False)
+    failed = index[index["error"].notna()]
+    for row in failed.itertuples():
+        print(f"❌ {row.channel_id}: {row.error}")
+    return index
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Write per-channel JSON/CSV/HTML analytics reports")
+    parser.add_argument("--channels", default="", help="comma-separated channel ids (default: all tracked channels)")
+    parser.add_argument("--out", default="reports", help="output directory (default: reports)")
+    parser.add_argument("--formats", default=",".join(FORMATS), help=f"comma-separated subset of {', '.join(FORMATS)}")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = sorted(set(formats) - set(FORMATS))
+    if unknown:
+        raise SystemExit(f"❌ Unknown format(s): {', '.join(unknown)}")
+    started = time.time()
+    channel_ids = [c.strip() for c in args.channels.split(",") if c.strip()]
+    index = generate_reports(channel_ids, args.out, formats, args.workers)
+    if not index.empty:
+        ok = int(index["error"].isna().sum())
+        print(f"✅ {ok}/{len(index)} channel reports written to {args.out}/ in {time.time() - started:.1f}s")
@@ -0,0 +1,179 @@
+"""
+Ingest-Time Rollups for YouTube Analytics Dashboard
+Derived tables are refreshed here right after new snapshots are written, so
+the dashboard reads small pre-aggregated rows instead of grouping raw history.
+"""
+
+from sqlalchemy import text, bindparam
+from youtube_db import get_engine
+from youtube_alerts import detect_anomalies
+from youtube_insight_snapshots import refresh_insight_snapshots
+from youtube_topics import refresh_title_index
+
+# Subscriber growth is measured over this trailing window
+GROWTH_WINDOW_DAYS = 30
+
+
+def _channel_filter(channel_ids, column="channel_id"):
+    """SQL predicate restricting a query to channel_ids (all channels if None)"""
+    if channel_ids is None:
+        return f"{column} IS NOT NULL"
+    return f"{column} IN :channel_ids"
+
+
+def _bind(sql, channel_ids):
+    stmt = text(sql)
+    if channel_ids is not None:
+        stmt = stmt.bindparams(bindparam("channel_ids", expanding=True))
+    return stmt
+
+
+def _get_watermark(conn, name):
+    last_id = conn.execute(text("SELECT last_id FROM rollup_state WHERE name = :name"), {"name": name}).scalar()
+    return last_id or 0
+
+
+def _set_watermark(conn, name, last_id):
+    conn.execute(text("INSERT OR REPLACE INTO rollup_state (name, last_id) VALUES (:name, :last_id)"),
+                 {"name": name, "last_id": last_id})
+
+
+def refresh_video_latest(conn):
+    """Fold video_stats rows added since the last run into video_latest
+
+    Only rows past the watermark are read: LAG() pairs consecutive snapshots
+    within the new batch, and the first new snapshot of a video is paired with
+    the row already in video_latest. Work is proportional to new snapshots,
+    not to history.
+    """
+    watermark = _get_watermark(conn, "video_latest")
+    max_id = conn.execute(text("SELECT MAX(id) FROM video_stats")).scalar()
+    if max_id is None or max_id <= watermark:
+        return
+    conn.execute(text("""
+        INSERT OR REPLACE INTO video_latest (
+            video_id, channel_id, title, published_at, fetched_at, snapshot_id,
+            views, likes, dislikes, comments,
+            views_per_hour, likes_per_hour, comments_per_hour,
+            delta_views, delta_likes, delta_comments, delta_hours, views_velocity
+        )
+        WITH batch AS (
+            SELECT id, channel_id, video_id, title, published_at, fetched_at,
+                   views, likes, dislikes, comments,
+                   LAG(views) OVER w AS prev_views,
+                   LAG(likes) OVER w AS prev_likes,
+                   LAG(comments) OVER w AS prev_comments,
+                   LAG(fetched_at) OVER w AS prev_fetched_at,
+                   ROW_NUMBER() OVER (PARTITION BY video_id ORDER BY fetched_at DESC, id DESC) AS rn
+            FROM video_stats
+            WHERE id > :watermark AND id <= :max_id
+            WINDOW w AS (PARTITION BY video_id ORDER BY fetched_at, id)
+        ),
+        paired AS (
+            SELECT b.*,
+                   COALESCE(b.prev_views, p.views) AS base_views,
+                   COALESCE(b.prev_likes, p.likes) AS base_likes,
+                   COALESCE(b.prev_comments, p.comments) AS base_comments,
+                   (julianday(b.fetched_at) - julianday(COALESCE(b.prev_fetched_at, p.fetched_at))) * 24 AS gap_hours,
+                   MAX((julianday(b.fetched_at) - julianday(b.published_at)) * 24, 1.0) AS age_hours
+            FROM batch b
+            LEFT JOIN video_latest p ON p.video_id = b.video_id
+            WHERE b.rn = 1
+        )
+        SELECT video_id, channel_id, title, published_at, fetched_at, id,
+               views, likes, dislikes, comments,
+               views / age_hours, likes / age_hours, comments / age_hours,
+               views - base_views, likes - base_likes, comments - base_comments, gap_hours,
+               -- Views/hour between the last two snapshots; lifetime rate until a second one exists
+               CASE WHEN gap_hours > 0 THEN (views - base_views) / gap_hours ELSE views / age_hours END
+        FROM paired
+    """), {"watermark": watermark, "max_id": max_id})
+    _set_watermark(conn, "video_latest", max_id)
+
+
+def refresh_channel_kpis(conn, channel_ids=None):
+    """Recompute channel_kpis rows for channel_ids (or every channel)"""
+    if channel_ids is not None and not channel_ids:
+        return
+    sql = f"""
+        INSERT OR REPLACE INTO channel_kpis (
+            channel_id, channel_name, subscribers, total_views, total_videos,
+            views_per_video, tracked_videos, engagement_rate, subs_growth_per_day,
+            snapshots, first_fetched_at, last_fetched_at, updated_at
+        )
+        WITH ranked AS (
+            SELECT channel_id, channel_name, subscribers, total_views, total_videos, fetched_at,
+                   ROW_NUMBER() OVER (PARTITION BY channel_id ORDER BY fetched_at DESC, id DESC) AS rn,
+                   COUNT(*) OVER (PARTITION BY channel_id) AS snapshots,
+                   MIN(fetched_at) OVER (PARTITION BY channel_id) AS first_fetched_at
+            FROM channel_stats
+            WHERE {_channel_filter(channel_ids)}
+        ),
+        latest AS (
+            SELECT * FROM ranked WHERE rn = 1
+        ),
+        baseline AS (
+            SELECT l.channel_id,
+                   (SELECT c.subscribers FROM channel_stats c
+                     WHERE c.channel_id = l.channel_id
+                       AND c.fetched_at >= datetime(l.fetched_at, '-{GROWTH_WINDOW_DAYS} days')
+                     ORDER BY c.fetched_at ASC LIMIT 1) AS subscribers,
+                   (SELECT c.fetched_at FROM channel_stats c
+                     WHERE c.channel_id = l.channel_id
+                       AND c.fetched_at >= datetime(l.fetched_at, '-{GROWTH_WINDOW_DAYS} days')
+                     ORDER BY c.fetched_at ASC LIMIT 1) AS fetched_at
+            FROM latest l
+        ),
+        video_totals AS (
+            SELECT channel_id,
+                   COUNT(*) AS tracked_videos,
+                   1.0 * SUM(likes + comments) / MAX(SUM(views), 1) AS engagement_rate
+            FROM video_latest
+            WHERE {_channel_filter(channel_ids)}
+            GROUP BY channel_id
+        )
+        SELECT l.channel_id, l.channel_name, l.subscribers, l.total_views, l.total_videos,
+               1.0 * l.total_views / MAX(l.total_videos, 1),
+               COALESCE(v.tracked_videos, 0),
+               COALESCE(v.engagement_rate, 0),
+               (l.subscribers - b.subscribers) / MAX(julianday(l.fetched_at) - julianday(b.fetched_at), 1.0),
+               l.snapshots, l.first_fetched_at, l.fetched_at, CURRENT_TIMESTAMP
+        FROM latest l
+        JOIN baseline b ON b.channel_id = l.channel_id
+        LEFT JOIN video_totals v ON v.channel_id = l.channel_id
+    """
+    params = {"channel_ids": list(channel_ids)} if channel_ids is not None else {}
+    conn.execute(_bind(sql, channel_ids), params)
+
+
+# Derived tables, in refresh order; all of them can be rebuilt from the raw snapshots
+# (insight_snapshots and alerts are history, not rollups, so a reset leaves them alone)
+ROLLUP_TABLES = ["video_latest", "channel_kpis", "video_titles", "video_hashtags", "hashtag_stats"]
+
+# The detectors' state and watermarks stay with the alerts they produced:
+# replaying them over old snapshots would raise the same alerts again
+ALERT_TABLES = ["detector_state", "alerts"]
+
+
+def reset_rollups(conn):
+    """Empty every derived table so the next refresh rebuilds it from scratch"""
+    for table in ROLLUP_TABLES:
+        conn.execute(text(f"DELETE FROM {table}"))
+    conn.execute(text("DELETE FROM rollup_state WHERE name NOT LIKE 'alerts\\_%' ESCAPE '\\'"))
+
+
+def reset_alerts(conn):
+    """Delete the alert history and detector state, for a full wipe of the snapshots"""
+    for table in ALERT_TABLES:
+        conn.execute(text(f"DELETE FROM {table}"))
+    conn.execute(text("DELETE FROM rollup_state WHERE name LIKE 'alerts\\_%' ESCAPE '\\'"))
+
+
+def refresh_rollups(channel_ids=None):
+    """Refresh every ingest-time rollup for channel_ids (or every channel) in one transaction"""
+    with get_engine().begin() as conn:
+        refresh_video_latest(conn)
+        refresh_channel_kpis(conn, channel_ids)
+        refresh_title_index(conn)
+        detect_anomalies(conn)
+        refresh_insight_snapshots(conn, channel_ids)
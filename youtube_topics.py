@@ -0,0 +1,109 @@
+"""
+Title Search & Hashtag Analytics for YouTube Analytics Dashboard
+Keeps an FTS5 index over video titles and a hashtag table in step with
+video_latest at ingest time, plus per-hashtag aggregates, so topic filters
+are index lookups instead of pandas scans over every title.
+"""
+
+import re
+from sqlalchemy import text, bindparam
+
+HASHTAG_RE = re.compile(r"#(\w+)", re.UNICODE)
+CHUNK = 500
+
+
+def extract_hashtags(title):
+    """Lower-cased, de-duplicated hashtags in a title"""
+    return sorted({tag.lower() for tag in HASHTAG_RE.findall(title or "")})
+
+
+def _chunks(items, size=CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def refresh_hashtag_stats(conn, tags):
+    """Recompute hashtag_stats rows for tags from video_latest"""
+    for chunk in _chunks(tags):
+        conn.execute(text("DELETE FROM hashtag_stats WHERE tag IN :tags")
+                     .bindparams(bindparam("tags", expanding=True)), {"tags": chunk})
+        conn.execute(text("""
+            INSERT INTO hashtag_stats (tag, video_count, total_views, median_views, engagement_rate, updated_at)
+            WITH tagged AS (
+                SELECT h.tag, v.views, v.likes, v.comments,
+                       ROW_NUMBER() OVER (PARTITION BY h.tag ORDER BY v.views) AS rn,
+                       COUNT(*) OVER (PARTITION BY h.tag) AS cnt
+                FROM video_hashtags h
+                JOIN video_latest v ON v.video_id = h.video_id
+                WHERE h.tag IN :tags
+            )
+            SELECT tag, MAX(cnt), SUM(views),
+                   AVG(CASE WHEN rn IN ((cnt + 1) / 2, (cnt + 2) / 2) THEN views END),
+                   1.0 * SUM(likes + comments) / MAX(SUM(views), 1),
+                   CURRENT_TIMESTAMP
+            FROM tagged
+            GROUP BY tag
+        """).bindparams(bindparam("tags", expanding=True)), {"tags": chunk})
+
+
+def refresh_title_index(conn):
+    """Sync titles, hashtags and hashtag stats for videos updated since the last run"""
+    watermark = conn.execute(text("SELECT last_id FROM rollup_state WHERE name = 'titles'")).scalar() or 0
+    rows = conn.execute(text("""
+        SELECT video_id, title, snapshot_id FROM video_latest WHERE snapshot_id > :watermark
+    """), {"watermark": watermark}).fetchall()
+    if not rows:
+        return
+
+    # Titles feed the FTS index through triggers on video_titles (rowids stay stable on update)
+    conn.execute(text("""
+        INSERT INTO video_titles (video_id, title) VALUES (:video_id, :title)
+        ON CONFLICT (video_id) DO UPDATE SET title = excluded.title
+        WHERE video_titles.title IS NOT excluded.title
+    """), [{"video_id": r[0], "title": r[1]} for r in rows])
+
+    touched_tags = set()
+    for chunk in _chunks(rows):
+        video_ids = [r[0] for r in chunk]
+        old_tags = conn.execute(text("SELECT DISTINCT tag FROM video_hashtags WHERE video_id IN :video_ids")
+                                .bindparams(bindparam("video_ids", expanding=True)), {"video_ids": video_ids})
+        touched_tags.update(tag for (tag,) in old_tags)
+        conn.execute(text("DELETE FROM video_hashtags WHERE video_id IN :video_ids")
+                     .bindparams(bindparam("video_ids", expanding=True)), {"video_ids": video_ids})
+        pairs = [{"tag": tag, "video_id": r[0]} for r in chunk for tag in extract_hashtags(r[1])]
+        if pairs:
+            conn.execute(text("INSERT OR IGNORE INTO video_hashtags (tag, video_id) VALUES (:tag, :video_id)"), pairs)
+            touched_tags.update(p["tag"] for p in pairs)
+
+    refresh_hashtag_stats(conn, touched_tags)
+    conn.execute(text("INSERT OR REPLACE INTO rollup_state (name, last_id) VALUES ('titles', :last_id)"),
+                 {"last_id": max(r[2] for r in rows)})
+
+
+def fts_query(keywords):
+    """Turn free text into a safe FTS5 prefix query (every word must match)"""
+    words = re.findall(r"\w+", keywords or "", re.UNICODE)
+    return " AND ".join(f'"{word}"*' for word in words)
+
+
+def search_video_ids(conn, keywords="", tags=()):
+    """Video ids whose title matches keywords and carries any of tags; None if no filter is set"""
+    queries, params = [], {}
+    match = fts_query(keywords)
+    if match:
+        queries.append("""
+            SELECT t.video_id FROM video_titles_fts f
+            JOIN video_titles t ON t.id = f.rowid
+            WHERE video_titles_fts MATCH :match
+        """)
+        params["match"] = match
+    if tags:
+        queries.append("SELECT video_id FROM video_hashtags WHERE tag IN :tags")
+        params["tags"] = [tag.lower().lstrip("#") for tag in tags]
+    if not queries:
+        return None
+    stmt = text(" INTERSECT ".join(queries))
+    if tags:
+        stmt = stmt.bindparams(bindparam("tags", expanding=True))
+    return {row[0] for row in conn.execute(stmt, params)}
@@ -0,0 +1,194 @@
+"""
+Lightweight Span Timing for YouTube Analytics Dashboard
+Times hot paths (SQL reads, pandas transforms, chart serialization, API
+calls, DB writes) and counts rows, bytes and quota units per span.
+
+Spans are only recorded while something is listening: the dashboard's debug
+panel (collect/start), or structured JSON logs when YOUTUBE_TRACE=1. With
+neither, span() hands back a shared no-op object, so instrumented code pays a
+single context-variable lookup.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import json
+import logging
+import os
+import time
+
+LOG_ENABLED = os.getenv("YOUTUBE_TRACE", "") not in ("", "0")
+
+logger = logging.getLogger("youtube.trace")
+if LOG_ENABLED and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_records = ContextVar("youtube_trace_records", default=None)
+_lap = ContextVar("youtube_trace_lap", default=None)
+
+
+class Span:
+    """One timed block; attributes set on it end up in the record"""
+    __slots__ = ("name", "attrs", "started")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.started = None
+
+    def __bool__(self):
+        return True
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key, amount=1):
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record = {"span": self.name, "ms": round((time.perf_counter() - self.started) * 1000, 3), **self.attrs}
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        _emit(record)
+        return False
+
+
+class _NoopSpan:
+    """Stand-in when tracing is off; falsy so callers can skip costly measurements"""
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+    def add(self, key, amount=1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP = _NoopSpan()
+
+
+def _emit(record):
+    records = _records.get()
+    if records is not None:
+        records.append(record)
+    if LOG_ENABLED:
+        logger.info(json.dumps(record, default=str))
+
+
+def active():
+    """True when spans are being recorded in this context"""
+    return LOG_ENABLED or _records.get() is not None
+
+
+def span(name, **attrs):
+    """Context manager timing a block: `with span("sql.load_tables") as s: ...; s.set(rows=n)`"""
+    if not LOG_ENABLED and _records.get() is None:
+        return NOOP
+    return Span(name, attrs)
+
+
+def _count_rows(result):
+    """Row count of a DataFrame / collection result (frames in a tuple are summed)"""
+    if isinstance(result, tuple):
+        counts = [_count_rows(item) for item in result]
+        return sum(c for c in counts if c is not None) if any(c is not None for c in counts) else None
+    if hasattr(result, "shape"):
+        return result.shape[0]
+    if isinstance(result, (list, set)):
+        return len(result)
+    return None
+
+
+def timed(name):
+    """Decorator: run the function inside a span and record how many rows it returned"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not LOG_ENABLED and _records.get() is None:
+                return fn(*args, **kwargs)
+            with Span(name, {}) as s:
+                result = fn(*args, **kwargs)
+                rows = _count_rows(result)
+                if rows is not None:
+                    s.set(rows=rows)
+                return result
+        return wrapper
+    return decorator
+
+
+def lap(name=None):
+    """Close the running lap span (if any) and start a new one named name
+
+    Lets a top-to-bottom script such as the dashboard time each section with
+    one line at its header instead of re-indenting it under a `with`.
+    """
+    if not LOG_ENABLED and _records.get() is None:
+        return
+    now = time.perf_counter()
+    current = _lap.get()
+    if current is not None:
+        _emit({"span": current[0], "ms": round((now - current[1]) * 1000, 3)})
+    _lap.set((name, now) if name else None)
+
+
+def start():
+    """Start collecting spans in this context (e.g. one dashboard rerun); returns the record list"""
+    records = []
+    _records.set(records)
+    _lap.set(None)
+    return records
+
+
+def stop():
+    """Stop collecting spans in this context"""
+    _records.set(None)
+    _lap.set(None)
+
+
+@contextmanager
+def collect():
+    """Collect the spans recorded inside the block into a list"""
+    records = []
+    token = _records.set(records)
+    try:
+        yield records
+    finally:
+        _records.reset(token)
+
+
+def replay(records):
+    """Add span records collected in another process (e.g. an ingest worker) to this context's collection"""
+    collected = _records.get()
+    if collected is not None:
+        collected.extend(records)
+
+
+def summarize(records):
+    """Per-span-name totals: calls, total/max ms and summed rows, bytes and quota"""
+    totals = {}
+    for record in records:
+        entry = totals.setdefault(record["span"], {"span": record["span"], "calls": 0, "total_ms": 0.0,
+                                                   "max_ms": 0.0, "rows": 0, "bytes": 0, "quota": 0})
+        entry["calls"] += 1
+        entry["total_ms"] += record["ms"]
+        entry["max_ms"] = max(entry["max_ms"], record["ms"])
+        for key in ("rows", "bytes", "quota"):
+            entry[key] += record.get(key) or 0
+    return sorted(totals.values(), key=lambda e: e["total_ms"], reverse=True)
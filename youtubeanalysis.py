@@ -1,66 +1,38 @@
-from googleapiclient.discovery import build
-import pandas as pd
-import os
-from dotenv import load_dotenv
+"""
+Print a channel's stats and latest videos
+Thin CLI wrapper around the fetch library in youtube_fetch.py:
 
-# Load environment variables from .env file
-load_dotenv()
+    python youtubeanalysis.py [--channel ID] [--max-videos 5]
+"""
 
-# Replace with your API Key (set in .env file)
-API_KEY = os.getenv("YOUTUBE_API_KEY", "")
-CHANNEL_ID = os.getenv("YOUTUBE_CHANNEL_ID", "UCv-yOn6QFBonsVyotOYmQCw")
+import argparse
+from youtube_fetch import API_KEY, CHANNEL_IDS, build_client, fetch_channel
 
-if not API_KEY or not CHANNEL_ID:
-    raise ValueError("Missing YOUTUBE_API_KEY or YOUTUBE_CHANNEL_ID in .env file")
+DEFAULT_CHANNEL_ID = CHANNEL_IDS[0] if CHANNEL_IDS else "UCv-yOn6QFBonsVyotOYmQCw"
 
-# Build YouTube API client
-youtube = build("youtube", "v3", developerKey=API_KEY)
 
-# 1. Get channel stats
-channel_request = youtube.channels().list(
-    part="snippet,contentDetails,statistics",
-    id=CHANNEL_ID
-)
-channel_response = channel_request.execute()
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Print a channel's stats and latest videos")
+    parser.add_argument("--channel", default=DEFAULT_CHANNEL_ID, help="channel id (default: first YOUTUBE_CHANNEL_ID)")
+    parser.add_argument("--max-videos", type=int, default=5, help="number of latest videos to show (default: 5)")
+    return parser.parse_args(argv)
 
-channel_data = channel_response["items"][0]
-channel_stats = {
-    "channel_name": channel_data["snippet"]["title"],
-    "subscribers": channel_data["statistics"]["subscriberCount"],
-    "total_views": channel_data["statistics"]["viewCount"],
-    "total_videos": channel_data["statistics"]["videoCount"]
-}
-print("Channel Stats:", channel_stats)
 
-# 2. Get latest videos
-playlist_id = channel_data["contentDetails"]["relatedPlaylists"]["uploads"]
-videos_request = youtube.playlistItems().list(
-    part="snippet",
-    playlistId=playlist_id,
-    maxResults=5
-)
-videos_response = videos_request.execute()
+def main(argv=None):
+    args = parse_args(argv)
+    if not API_KEY or not args.channel:
+        raise SystemExit("Missing YOUTUBE_API_KEY or YOUTUBE_CHANNEL_ID in .env file")
 
-videos = []
-for item in videos_response["items"]:
-    video_title = item["snippet"]["title"]
-    video_id = item["snippet"]["resourceId"]["videoId"]
+    import pandas as pd
+    result = fetch_channel(build_client(), args.channel, args.max_videos)
+    if result is None:
+        raise SystemExit(1)
+    channel_stats, videos = result
+    print("Channel Stats:", channel_stats)
 
-    # Get video statistics
-    stats_request = youtube.videos().list(
-        part="statistics",
-        id=video_id
-    )
-    stats_response = stats_request.execute()
-    stats = stats_response["items"][0]["statistics"]
+    df = pd.DataFrame(videos, columns=["video_id", "title", "views", "likes", "comments"])
+    print("\nLatest Videos:\n", df)
 
-    videos.append({
-        "video_id": video_id,
-        "title": video_title,
-        "views": stats.get("viewCount", 0),
-        "likes": stats.get("likeCount", 0),
-        "comments": stats.get("commentCount", 0)
-    })
 
-df = pd.DataFrame(videos)
-print("\nLatest Videos:\n", df)
+if __name__ == "__main__":
+    main()